@@ -0,0 +1,331 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import rlp
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+
+TRANSFER_GAS_USED = 21000
+ZERO_HASH = "0x" + "00" * 32
+
+
+@dataclass
+class NodeConfig:
+    chain_id: int = 31337
+    latency: float = 0.02
+    jitter: float = 0.01
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    block_time: float = 1.0
+    gas_price: int = 10**9
+    default_balance: int = 10**18
+    # Transactions priced below this stay in the mempool until replaced
+    min_gas_price: int = 0
+    replacement_bump: float = 1.1
+
+
+@dataclass
+class _MempoolTx:
+    tx_hash: str
+    sender: str
+    nonce: int
+    to: str | None
+    value: int
+    gas: int
+    gas_price: int
+    received_at: float
+
+
+class MockNode:
+    # Just enough of an EVM node for the transfer paths: balances, nonces, a
+    # mempool mined every block_time, receipts, and injected latency and failures
+
+    def __init__(self, config: NodeConfig | None = None, port: int = 0):
+        self.config = config or NodeConfig()
+        self.balances = {}
+        self.nonces = {}
+        self.mempool = {}
+        self.receipts = {}
+        self.transactions = {}
+        self.block_number = 1
+
+        self.http_requests = 0
+        self.rate_limited = 0
+        self.calls = Counter()
+        self.sent_at = {}
+        self.confirmed_seen_at = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockNode":
+        for target in (self._server.serve_forever, self._mine_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.http_requests = 0
+            self.rate_limited = 0
+            self.calls.clear()
+            self.sent_at.clear()
+            self.confirmed_seen_at.clear()
+
+    def fund(self, address: str, amount: int) -> None:
+        with self._lock:
+            self.balances[address.lower()] = amount
+
+    def _balance(self, address: str) -> int:
+        return self.balances.setdefault(address.lower(), self.config.default_balance)
+
+    def _pending_nonce(self, address: str) -> int:
+        address = address.lower()
+        nonce = self.nonces.get(address, 0)
+        queued = {tx.nonce for tx in self.mempool.values() if tx.sender == address}
+        while nonce in queued:
+            nonce += 1
+        return nonce
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                status, reply = node.handle(json.loads(body))
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, payload) -> tuple[int, dict | list]:
+        config = self.config
+        delay = config.latency + random.uniform(0, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        requests = payload if isinstance(payload, list) else [payload]
+        with self._lock:
+            self.http_requests += 1
+            if random.random() < config.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, {"error": "Too Many Requests"}
+            for request in requests:
+                self.calls[request.get("method")] += 1
+
+        replies = [self._answer(request) for request in requests]
+        return 200, replies if isinstance(payload, list) else replies[0]
+
+    def _answer(self, request: dict) -> dict:
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        if random.random() < self.config.error_rate:
+            reply["error"] = {"code": -32603, "message": "internal error (injected)"}
+            return reply
+
+        method = request.get("method")
+        handler = getattr(self, "rpc_" + method, None)
+        if handler is None:
+            reply["error"] = {"code": -32601, "message": f"{method} not supported"}
+            return reply
+
+        try:
+            with self._lock:
+                reply["result"] = handler(*request.get("params", []))
+        except ValueError as e:
+            reply["error"] = {"code": -32000, "message": str(e)}
+        return reply
+
+    def rpc_eth_chainId(self):
+        return hex(self.config.chain_id)
+
+    def rpc_net_version(self):
+        return str(self.config.chain_id)
+
+    def rpc_eth_blockNumber(self):
+        return hex(self.block_number)
+
+    def rpc_eth_gasPrice(self):
+        return hex(self.config.gas_price)
+
+    def rpc_eth_maxPriorityFeePerGas(self):
+        return hex(self.config.gas_price // 10)
+
+    def rpc_eth_getBalance(self, address, block="latest"):
+        return hex(self._balance(address))
+
+    def rpc_eth_getCode(self, address, block="latest"):
+        return "0x"
+
+    def rpc_eth_getTransactionCount(self, address, block="latest"):
+        if block == "pending":
+            return hex(self._pending_nonce(address))
+        return hex(self.nonces.get(address.lower(), 0))
+
+    def rpc_eth_estimateGas(self, tx, block=None):
+        return hex(TRANSFER_GAS_USED)
+
+    def rpc_eth_getBlockByNumber(self, block, full=False):
+        number = self.block_number if block in ("latest", "pending") else int(block, 16)
+        return {
+            "number": hex(number),
+            "hash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "parentHash": ZERO_HASH,
+            "timestamp": hex(int(time.time())),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "baseFeePerGas": hex(self.config.gas_price),
+            "miner": "0x" + "00" * 20,
+            "extraData": "0x",
+            "transactions": [],
+        }
+
+    def rpc_eth_sendRawTransaction(self, raw):
+        data = bytes.fromhex(raw[2:])
+        tx_hash = "0x" + keccak(data).hex()
+        if tx_hash in self.mempool or tx_hash in self.receipts:
+            raise ValueError("already known")
+
+        sender = Account.recover_transaction(data).lower()
+        if data[0] < 0x7F:
+            # Typed envelope: chainId, nonce, tip, maxFee, gas, to, value, ...
+            fields = rlp.decode(data[1:])
+            nonce, gas_price, gas, to, value = (
+                fields[1],
+                fields[3],
+                fields[4],
+                fields[5],
+                fields[6],
+            )
+        else:
+            nonce, gas_price, gas, to, value = rlp.decode(data)[:5]
+        nonce, gas_price, gas, value = (
+            int.from_bytes(item, "big") for item in (nonce, gas_price, gas, value)
+        )
+
+        if nonce < self.nonces.get(sender, 0):
+            raise ValueError("nonce too low")
+        queued = next(
+            (
+                tx
+                for tx in self.mempool.values()
+                if tx.sender == sender and tx.nonce == nonce
+            ),
+            None,
+        )
+        if queued is not None:
+            if gas_price < queued.gas_price * self.config.replacement_bump:
+                raise ValueError("replacement transaction underpriced")
+            del self.mempool[queued.tx_hash]
+        if value + gas * gas_price > self._balance(sender):
+            raise ValueError("insufficient funds for gas * price + value")
+
+        self.mempool[tx_hash] = _MempoolTx(
+            tx_hash,
+            sender,
+            nonce,
+            "0x" + to.hex() if to else None,
+            value,
+            gas,
+            gas_price,
+            time.perf_counter(),
+        )
+        self.sent_at[tx_hash] = time.perf_counter()
+        return tx_hash
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash):
+        receipt = self.receipts.get(tx_hash)
+        if receipt is not None:
+            self.confirmed_seen_at.setdefault(tx_hash, time.perf_counter())
+        return receipt
+
+    def rpc_eth_getTransactionByHash(self, tx_hash):
+        tx = self.mempool.get(tx_hash)
+        if tx is not None:
+            return self._tx_json(tx, None)
+        return self.transactions.get(tx_hash)
+
+    def _tx_json(self, tx: _MempoolTx, block_number: int | None) -> dict:
+        return {
+            "hash": tx.tx_hash,
+            "from": to_checksum_address(tx.sender),
+            "to": to_checksum_address(tx.to) if tx.to else None,
+            "nonce": hex(tx.nonce),
+            "value": hex(tx.value),
+            "gas": hex(tx.gas),
+            "gasPrice": hex(tx.gas_price),
+            "input": "0x",
+            "blockNumber": hex(block_number) if block_number is not None else None,
+        }
+
+    def _mine_loop(self) -> None:
+        while not self._stop.wait(self.config.block_time):
+            with self._lock:
+                self._mine()
+
+    def _mine(self) -> None:
+        self.block_number += 1
+        block_hash = "0x" + keccak(self.block_number.to_bytes(32, "big")).hex()
+
+        # Only nonces that continue a sender's sequence can be included
+        mined, index = True, 0
+        while mined:
+            mined = False
+            for tx in sorted(self.mempool.values(), key=lambda tx: tx.nonce):
+                if (
+                    tx.nonce != self.nonces.get(tx.sender, 0)
+                    or tx.gas_price < self.config.min_gas_price
+                ):
+                    continue
+                del self.mempool[tx.tx_hash]
+                self.nonces[tx.sender] = tx.nonce + 1
+                self.balances[tx.sender] = self._balance(tx.sender) - (
+                    tx.value + TRANSFER_GAS_USED * tx.gas_price
+                )
+                if tx.to:
+                    self.balances[tx.to] = self._balance(tx.to) + tx.value
+
+                self.transactions[tx.tx_hash] = self._tx_json(tx, self.block_number)
+                self.receipts[tx.tx_hash] = {
+                    "transactionHash": tx.tx_hash,
+                    "transactionIndex": hex(index),
+                    "blockHash": block_hash,
+                    "blockNumber": hex(self.block_number),
+                    "from": to_checksum_address(tx.sender),
+                    "to": to_checksum_address(tx.to) if tx.to else None,
+                    "cumulativeGasUsed": hex(TRANSFER_GAS_USED * (index + 1)),
+                    "gasUsed": hex(TRANSFER_GAS_USED),
+                    "effectiveGasPrice": hex(tx.gas_price),
+                    "contractAddress": None,
+                    "logs": [],
+                    "logsBloom": "0x" + "00" * 256,
+                    "status": "0x1",
+                    "type": "0x0",
+                }
+                index += 1
+                mined = True
@@ -0,0 +1,341 @@
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from eth_account import Account
+from loguru import logger
+from .mock_node import MockNode, NodeConfig
+
+MODES = ("one_to_many", "many_to_one", "sharded")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def git_revision() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(RESULTS_DIR),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return "unknown"
+
+
+@contextmanager
+def timed_performs(started: dict):
+    # Latency runs from the first attempt of a send to the moment the client
+    # first reads a successful receipt for the hash it returned
+    from src.actions.transfer import Transfer
+
+    originals = {
+        name: getattr(Transfer, name) for name in ("perform", "perform_planned")
+    }
+
+    def timed(original):
+        def send(self, *args, **kwargs):
+            started_at = time.perf_counter()
+            tx_hash = original(self, *args, **kwargs)
+            if tx_hash:
+                started[tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash] = (
+                    started_at
+                )
+            return tx_hash
+
+        return send
+
+    for name, original in originals.items():
+        setattr(Transfer, name, timed(original))
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(Transfer, name, original)
+
+
+def run_one_to_many(main, network, node, admin, size):
+    with open("data/data.txt", "w") as f:
+        for _ in range(size):
+            f.write(f"{Account.create().address},0.0001\n")
+
+    node.fund(admin.address, 10**30)
+    main.PRIVATE_KEY = admin.key.hex()
+    main.one_to_many(data_path="data/data.txt", network=network, results_dir="results")
+
+
+def run_sharded(main, network, node, admin, size, hot_wallets):
+    with open("data/data.txt", "w") as f:
+        for _ in range(size):
+            f.write(f"{Account.create().address},0.0001\n")
+
+    node.fund(admin.address, 10**30)
+    main.PRIVATE_KEY = admin.key.hex()
+    main.one_to_many_sharded(
+        hot_wallets=hot_wallets,
+        data_path="data/data.txt",
+        network=network,
+        results_dir="results",
+    )
+
+
+def run_many_to_one(main, network, node, admin, size, workers, empty_fraction):
+    empty = int(size * empty_fraction)
+    with open("data/private_keys.txt", "w") as f:
+        for i in range(size):
+            account = Account.create()
+            if i < empty:
+                node.fund(account.address, 0)
+            f.write(account.key.hex() + "\n")
+    open("data/proxies.txt", "w").close()
+
+    main.TARGET_ADDRESS = admin.address
+    main.many_to_one(workers=workers, network=network)
+
+
+def run_case(
+    main, network, node, admin, mode, size, workers, empty_fraction=0.0, hot_wallets=4
+) -> dict:
+    from src.utils.metrics.metrics import RETRIES, STAGE_LATENCY, metrics
+
+    node.reset_counters()
+    metrics.reset()
+    main.RUN_ID = f"bench-{mode}-{size}-{time.time_ns()}"
+    started = {}
+
+    began = time.perf_counter()
+    with timed_performs(started):
+        if mode == "one_to_many":
+            run_one_to_many(main, network, node, admin, size)
+        elif mode == "sharded":
+            run_sharded(main, network, node, admin, size, hot_wallets)
+        else:
+            run_many_to_one(main, network, node, admin, size, workers, empty_fraction)
+    seconds = time.perf_counter() - began
+
+    latencies = [
+        node.confirmed_seen_at[tx_hash] - started_at
+        for tx_hash, started_at in started.items()
+        if tx_hash in node.confirmed_seen_at
+    ]
+    confirmed = len(node.confirmed_seen_at)
+    rpc_calls = sum(node.calls.values())
+    recorded = metrics.to_dict()
+
+    return {
+        "mode": mode,
+        "size": size,
+        "confirmed": confirmed,
+        "failed": max(size - confirmed, 0),
+        "seconds": round(seconds, 3),
+        "transfers_per_second": round(confirmed / seconds, 3) if seconds else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p99": percentile(latencies, 99),
+        "rpc_calls_per_transfer": (
+            round(rpc_calls / confirmed, 2) if confirmed else None
+        ),
+        "http_requests_per_transfer": (
+            round(node.http_requests / confirmed, 2) if confirmed else None
+        ),
+        "rate_limited": node.rate_limited,
+        "calls_by_method": dict(node.calls.most_common()),
+        "stages": {
+            entry["labels"]["stage"]: {
+                key: entry[key] for key in ("count", "mean", "p50", "p99")
+            }
+            for entry in recorded.get(STAGE_LATENCY, [])
+        },
+        "retries": {
+            f"{entry['labels']['function']}:{entry['labels']['exception']}": entry[
+                "value"
+            ]
+            for entry in recorded.get(RETRIES, [])
+        },
+    }
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    previous = {(run["mode"], run["size"]): run for run in baseline["runs"]}
+
+    print(f"\nCompared to {baseline.get('revision')} ({baseline_path}):")
+    for run in current["runs"]:
+        old = previous.get((run["mode"], run["size"]))
+        if old is None:
+            continue
+        line = f"  {run['mode']:<12} {run['size']:>6}"
+        for key in ("transfers_per_second", "latency_p99", "rpc_calls_per_transfer"):
+            if run[key] is None or not old.get(key):
+                continue
+            change = (run[key] - old[key]) / old[key] * 100
+            line += f"  {key} {old[key]:.3f} -> {run[key]:.3f} ({change:+.1f}%)"
+        print(line)
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{'mode':<12} {'size':>6} {'ok':>6} {'tx/s':>9} {'p50 s':>8} {'p99 s':>8} {'rpc/tx':>8} {'http/tx':>8} {'429s':>6}"
+    )
+    for run in report["runs"]:
+        p50, p99 = run["latency_p50"], run["latency_p99"]
+        print(
+            f"{run['mode']:<12} {run['size']:>6} {run['confirmed']:>6} "
+            f"{run['transfers_per_second'] or 0:>9.2f} "
+            f"{p50 if p50 is not None else float('nan'):>8.2f} "
+            f"{p99 if p99 is not None else float('nan'):>8.2f} "
+            f"{run['rpc_calls_per_transfer'] or 0:>8.2f} "
+            f"{run['http_requests_per_transfer'] or 0:>8.2f} "
+            f"{run['rate_limited']:>6}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure transfer throughput against a local mock JSON-RPC node"
+    )
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--sizes", default="10,50,200")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--block-time", type=float, default=1.0)
+    parser.add_argument("--rps", type=float, default=1000)
+    parser.add_argument(
+        "--empty-fraction",
+        type=float,
+        default=0.0,
+        help="share of many_to_one wallets that start with a zero balance",
+    )
+    parser.add_argument(
+        "--hot-wallets",
+        type=int,
+        default=4,
+        help="hot wallets the sharded mode sends from",
+    )
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    for mode in modes:
+        if mode not in MODES:
+            raise SystemExit(f"Unknown mode {mode}, expected one of {MODES}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO" if args.verbose else "ERROR")
+
+    config = NodeConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        block_time=args.block_time,
+    )
+    node = MockNode(config).start()
+
+    revision = git_revision()
+    out_path = os.path.abspath(
+        args.out
+        or os.path.join(
+            RESULTS_DIR,
+            f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{args.label or revision}.json",
+        )
+    )
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    workdir = tempfile.mkdtemp(prefix="multisender-bench-")
+    os.makedirs(os.path.join(workdir, "data"))
+    os.makedirs(os.path.join(workdir, "results"))
+
+    # main resolves data/ and results/ against the working directory
+    import main as app
+    from src.models.networks import Network
+
+    network = Network(
+        name="Benchmark",
+        chain_id=config.chain_id,
+        rpc_list=[node.url],
+        scanner=node.url,
+        token="ETH",
+        rps=args.rps,
+        burst=int(args.rps),
+    )
+    admin = Account.create()
+
+    report = {
+        "label": args.label,
+        "revision": revision,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "block_time": args.block_time,
+            "rps": args.rps,
+            "workers": args.workers,
+            "empty_fraction": args.empty_fraction,
+            "hot_wallets": args.hot_wallets,
+        },
+        "runs": [],
+    }
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for mode in modes:
+            for size in sizes:
+                print(f"Running {mode} with {size} transfers...", file=sys.stderr)
+                report["runs"].append(
+                    run_case(
+                        app,
+                        network,
+                        node,
+                        admin,
+                        mode,
+                        size,
+                        args.workers,
+                        args.empty_fraction,
+                        args.hot_wallets,
+                    )
+                )
+    finally:
+        os.chdir(cwd)
+        node.stop()
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"\nResults saved to {out_path}")
+    if compare_path:
+        compare(report, compare_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,205 +1,966 @@
+import argparse
+import asyncio
+import json
 import os
-from src.utils.helpers.helpers import sleeping
-from src.actions.transfer import Transfer
+import sys
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from dotenv import load_dotenv
 from loguru import logger
-from src.models.networks import Networks
+from src.config.constants import (
+    ASYNC_CONCURRENCY,
+    BATCH_FILE_PATH,
+    HOT_WALLETS,
+    MANY_TO_ONE_WORKERS,
+    METRICS_JSON_PATH,
+    SWEEP_DUST_FLOOR,
+)
+from src.models.networks import Network, Networks
+
+# Everything that pulls in web3 or eth_account is imported inside the mode that
+# needs it, so --help, --validate-only and --dry-run start without it
 
 load_dotenv()
 
 PRIVATE_KEY = os.environ.get("ADMIN_PKEY")
 TARGET_ADDRESS = os.environ.get("TARGET_ADDRESS")
 ACCOUNT_NAME = "admin wallet"
-
-
-def choose_mode():
-    try:
-        val = int(
-            input(
-                "Choose your option:\n1. One wallet to many\n2. Many wallets to one\n"
-            )
-        )
-        if val not in range(1, 3):
-            raise Exception("Invalid input")
-        return val
-    except Exception:
+# Every invocation journals under its own run id unless one is given, so a new
+# airdrop or sweep never skips recipients confirmed by an earlier one. Resuming
+# a run means passing its id again
+RUN_ID = (
+    os.environ.get("RUN_ID") or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+)
+
+MODES = {
+    "one-to-many": "One wallet to many",
+    "many-to-one": "Many wallets to one",
+    "many-to-one-async": "Many wallets to one (async)",
+    "disperse": "One wallet to many (disperse contract)",
+    "plan": "Plan signed batch (one to many)",
+    "broadcast": "Broadcast signed batch",
+    "fanout": "One wallet to many on several networks",
+    "sharded": "One wallet to many through parallel hot wallets",
+}
+DEFAULT_NETWORKS = {
+    "many-to-one": Networks.Binance,
+    "many-to-one-async": Networks.Binance,
+}
+
+
+def choose_mode() -> str:
+    options = list(MODES)
+    prompt = "Choose your option:\n" + "".join(
+        f"{i}. {MODES[mode]}\n" for i, mode in enumerate(options, start=1)
+    )
+    while True:
+        try:
+            val = int(input(prompt))
+            if val in range(1, len(options) + 1):
+                return options[val - 1]
+        except ValueError:
+            pass
         logger.warning("Invalid input. Try again")
-        return choose_mode()
-
 
-def load_processed_addresses():
-    return set()
 
+def resolve_network(value: str) -> Network:
+    network = (
+        Networks.get_network_by_chain_id(int(value))
+        if value.isdigit()
+        else Networks.get_network_by_name(value)
+    )
+    if network is None:
+        # Also accept the attribute names, e.g. "Monad" or "binance"
+        for name, candidate in vars(Networks).items():
+            if isinstance(candidate, Network) and value.lower() in (
+                name.lower(),
+                candidate.name.lower(),
+            ):
+                network = candidate
+    if network is None:
+        raise argparse.ArgumentTypeError(f"Unknown network: {value}")
+    return network
+
+
+def native_amount(value: str) -> int:
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise argparse.ArgumentTypeError(f"Invalid amount: {value}")
+    if not amount.is_finite() or amount < 0:
+        raise argparse.ArgumentTypeError(f"Invalid amount: {value}")
+    return int(amount.scaleb(18))
 
-def parse_transfer_data():
-    transfer_data = []
-    skipped_lines = []
 
+def read_lines(path: str) -> list[str] | None:
     try:
-        with open("data/data.txt", "r") as f:
-            lines = f.read().splitlines()
+        with open(path, "r") as f:
+            return [line.strip() for line in f if line.strip()]
     except FileNotFoundError:
-        logger.error("data/data.txt not found!")
-        return [], []
+        logger.error(f"{path} not found!")
+        return None
 
-    for line_num, line in enumerate(lines, 1):
-        line = line.strip()
-        if not line:
-            continue
 
-        try:
-            parts = line.split(",")
-            if len(parts) != 2:
-                raise ValueError(
-                    f"Expected 2 parts separated by comma, got {len(parts)}"
-                )
+def write_merge_report(ingest, results_dir: str, token: str) -> None:
+    from src.utils.ingest.ingest import format_wei
 
-            address = parts[0].strip()
-            amount = float(parts[1].strip())
+    if not ingest.merged:
+        return
 
-            if not address.startswith("0x") or len(address) != 42:
-                raise ValueError(f"Invalid address format: {address}")
+    rows = sum(len(merged.line_nums) for merged in ingest.merged)
+    with open(os.path.join(results_dir, "mergedRecipients.txt"), "w") as f:
+        for merged in ingest.merged:
+            f.write(
+                f"{merged.address}, {format_wei(merged.amount_wei)}, lines {' '.join(map(str, merged.line_nums))}\n"
+            )
+    logger.info(
+        f"Merged {rows} rows of {len(ingest.merged)} repeated recipients ({format_wei(sum(merged.amount_wei for merged in ingest.merged))} {token}) - saved to mergedRecipients.txt"
+    )
 
-            if amount <= 0:
-                raise ValueError(f"Invalid amount: {amount}")
 
-            transfer_data.append((address, amount))
+def load_processed_addresses(journal, client, sender=None):
+    from src.utils.journal.journal import reconcile
 
-        except Exception as e:
-            error_msg = f"Line {line_num}: '{line}' - Error: {str(e)}"
-            logger.error(error_msg)
-            skipped_lines.append(error_msg)
+    entries = journal.load(client.network.name, sender)
+    done, pending = reconcile(journal, client, entries)
+    logger.info(
+        f"Journal run '{journal.run_id}': {len(done) - len(pending)} transfers already confirmed, {len(pending)} still pending"
+    )
+    return done, pending
 
-    return transfer_data, skipped_lines
 
+def unswept_wallets(journal, client, private_keys, addresses, proxies):
+    from itertools import cycle
+    from src.utils.journal.journal import journal_key
+
+    processed_addresses, _ = load_processed_addresses(journal, client)
+
+    proxy_cycle = cycle(proxies or [None])
+    wallets, skipped = [], []
+    for account_name, (private_key, address) in enumerate(
+        zip(private_keys, addresses), start=1
+    ):
+        proxy = next(proxy_cycle)
+        if (
+            address is not None
+            and journal_key(address, TARGET_ADDRESS, "full") in processed_addresses
+        ):
+            logger.info(f"{address} - Already swept, skipping")
+            skipped.append(f"{address} - Skipped - already swept")
+            continue
+        wallets.append((account_name, private_key, proxy, address))
+    return wallets, skipped
+
+
+def record_sweep(journal, address: str, network_name: str, result, state) -> str:
+    from src.utils.journal.journal import BROADCAST, CONFIRMED
+
+    # A mined sweep can still have reverted, only a successful receipt counts
+    # as swept
+    if state != BROADCAST:
+        journal.mark(network_name, address, TARGET_ADDRESS, "full", state, result)
+    if state == CONFIRMED:
+        return f"{address} - Success - {result}"
+    if state == BROADCAST:
+        return f"{address} - Pending - {result}"
+    return f"{address} - Failed - {result}"
+
+
+def one_to_many(
+    disperse: bool = False,
+    data_path: str = "data/data.txt",
+    network: Network = Networks.Monad,
+    results_dir: str = "results",
+    coalesce: bool = False,
+    private_key: str | None = None,
+    account_name: str | None = None,
+):
+    from src.actions.transfer import Transfer
+    from src.client.receipt_tracker import ReceiptTracker
+    from src.utils.ingest.ingest import TransferIngest, format_wei
+    from collections import Counter
+    from src.utils.journal.journal import (
+        BROADCAST,
+        CONFIRMED,
+        FAILED,
+        TransferJournal,
+        journal_amount,
+        journal_amount_wei,
+    )
+    from eth_utils import to_checksum_address
 
-def one_to_many():
     logger.info("Starting one-to-many transfer process")
 
-    transfer_data, skipped_lines = parse_transfer_data()
-    processed_addresses = load_processed_addresses()
-
-    if skipped_lines:
-        logger.warning(f"Skipped {len(skipped_lines)} invalid lines:")
-        for skip in skipped_lines:
-            logger.warning(skip)
-
-    if not transfer_data:
-        logger.error("No valid transfer data found!")
+    if not os.path.exists(data_path):
+        logger.error(f"{data_path} not found!")
         return
 
-    logger.info(f"Loaded {len(transfer_data)} valid transfers")
-    logger.info("Processing ALL wallets (no duplicate checking)")
+    ingest = TransferIngest(data_path)
+    if coalesce:
+        logger.info("Merging duplicate recipients into one transfer each")
+    else:
+        logger.info("Processing ALL wallets (no duplicate checking)")
 
-    pending_transfers = transfer_data
-    logger.info(f"Processing {len(pending_transfers)} pending transfers")
     transfer = Transfer(
-        account_name=ACCOUNT_NAME, private_key=PRIVATE_KEY, network=Networks.Monad
+        account_name=account_name or ACCOUNT_NAME,
+        private_key=private_key or PRIVATE_KEY,
+        network=network,
+    )
+    journal = TransferJournal(run_id=RUN_ID)
+    transfer.journal = journal
+    processed_addresses, in_mempool = load_processed_addresses(
+        journal, transfer, transfer.address
     )
+    token = transfer.network.token
 
     results = []
     failed_transfers = []
 
-    for i, (address, amount) in enumerate(pending_transfers, 1):
-        logger.info(
-            f"Processing {i}/{len(pending_transfers)}: {address} - {amount:.6f} {transfer.network.token}"
+    def on_receipt(outcome):
+        address, amount_wei, entry_amount = outcome.context
+        if outcome.status != ReceiptTracker.TIMEOUT:
+            journal.mark(
+                transfer.network.name,
+                transfer.address,
+                address,
+                entry_amount,
+                CONFIRMED if outcome.status == ReceiptTracker.SUCCESS else FAILED,
+                outcome.tx_hash,
+            )
+
+        if outcome.status == ReceiptTracker.SUCCESS:
+            logger.success(
+                f"{address} - {format_wei(amount_wei)} {token} - Confirmed: {transfer.network.scanner}/tx/{outcome.tx_hash}"
+            )
+            results.append(f"{address} - SUCCESS - {outcome.tx_hash}")
+        else:
+            logger.warning(
+                f"{address} - {format_wei(amount_wei)} {token} - {outcome.status}: {transfer.network.scanner}/tx/{outcome.tx_hash}"
+            )
+            results.append(f"{address} - {outcome.status.upper()} - {outcome.tx_hash}")
+            failed_transfers.append((address, amount_wei))
+
+    tracker = ReceiptTracker(
+        transport=transfer.batch_transport,
+        on_result=on_receipt,
+        on_block=transfer.fee_oracle.observe_block,
+        monitor=transfer.tx_monitor,
+    ).start()
+
+    for (_, recipient, amount), tx_hash in in_mempool.items():
+        tracker.track(
+            tx_hash,
+            context=(
+                to_checksum_address(recipient),
+                journal_amount_wei(amount),
+                amount,
+            ),
         )
 
-        try:
-            result = transfer.perform(address, amount)
+    # Disperse chunks and their per-address fallbacks confirm inline, everything
+    # else is confirmed in the background while the next transfers go out
+    transfer.receipt_tracker = None if disperse else tracker
+    processed = 0
+    occurrences = Counter()
+
+    for chunk in ingest.coalesced_chunks() if coalesce else ingest.chunks():
+        pending_transfers = []
+        for row in chunk:
+            # Identical rows are journaled apart by how many came before them
+            seen = (row.address.lower(), row.amount_wei)
+            entry_amount = journal_amount(row.amount_wei, occurrences[seen])
+            occurrences[seen] += 1
+            key = (transfer.address.lower(), row.address.lower(), entry_amount)
+            if key not in processed_addresses:
+                pending_transfers.append((row.address, row.amount_wei, entry_amount))
+
+        if disperse and pending_transfers:
+            try:
+                dispersed = transfer.perform_disperse(
+                    [
+                        (address, amount_wei)
+                        for address, amount_wei, _ in pending_transfers
+                    ],
+                    journal_amounts=[
+                        entry_amount for _, _, entry_amount in pending_transfers
+                    ],
+                )
+            except Exception as e:
+                logger.error(f"Disperse mode failed: {str(e)}")
+                dispersed = [
+                    (address, amount_wei, FAILED, None)
+                    for address, amount_wei, _ in pending_transfers
+                ]
+
+            # perform_disperse journals every chunk itself as it goes
+            for address, amount_wei, state, result in dispersed:
+                if state == BROADCAST:
+                    # Sent but not seen mined, a resume checks it before resending
+                    results.append(f"{address} - PENDING - {result}")
+                elif state != CONFIRMED:
+                    results.append(f"{address} - FAILED - {result}")
+                    failed_transfers.append((address, amount_wei))
+                else:
+                    results.append(f"{address} - SUCCESS - {result}")
+
+            processed += len(pending_transfers)
+            continue
 
-            if result:
-                success_msg = f"{address} - SUCCESS - {result}"
-                results.append(success_msg)
-            else:
-                failed_msg = f"{address} - FAILED - None"
-                results.append(failed_msg)
-                failed_transfers.append((address, amount))
+        # One batched code lookup per chunk lets transfers to EOAs skip gas
+        # estimation
+        transfer.classify_recipients([address for address, _, _ in pending_transfers])
 
-        except Exception as e:
-            error_msg = f"{address} - ERROR - {str(e)}"
-            results.append(error_msg)
-            failed_transfers.append((address, amount))
-            logger.error(
-                f"{address} - {amount} {transfer.network.token} - Exception: {str(e)}"
+        for address, amount_wei, entry_amount in pending_transfers:
+            processed += 1
+            logger.info(
+                f"Processing {processed}: {address} - {format_wei(amount_wei)} {token}"
             )
 
-        if i < len(pending_transfers):
-            sleeping(2)
+            try:
+                result = transfer.perform(
+                    address,
+                    amount_wei,
+                    tx_context=(address, amount_wei, entry_amount),
+                    journal_amount=entry_amount,
+                )
+
+                if not result:
+                    failed_msg = f"{address} - FAILED - None"
+                    results.append(failed_msg)
+                    failed_transfers.append((address, amount_wei))
+
+            except Exception as e:
+                error_msg = f"{address} - ERROR - {str(e)}"
+                results.append(error_msg)
+                failed_transfers.append((address, amount_wei))
+                logger.error(
+                    f"{address} - {format_wei(amount_wei)} {token} - Exception: {str(e)}"
+                )
+
+    if ingest.skipped:
+        logger.warning(f"Skipped {len(ingest.skipped)} invalid lines")
+    if ingest.merged:
+        write_merge_report(ingest, results_dir, token)
+    elif ingest.duplicates:
+        logger.warning(
+            f"{len(ingest.duplicates)} rows repeat an earlier recipient, e.g. line {ingest.duplicates[0].line_num} (first seen on line {ingest.duplicates[0].duplicate_of})"
+        )
+    if not ingest.rows_read:
+        logger.error("No valid transfer data found!")
+
+    if tracker.in_flight:
+        logger.info(f"Waiting for {tracker.in_flight} receipts")
+    tracker.stop()
 
     if results:
-        with open("results/oneToManyResults.txt", "a") as f:
+        with open(os.path.join(results_dir, "oneToManyResults.txt"), "a") as f:
             for line in results:
                 f.write(line + "\n")
         logger.info("Results saved to oneToManyResults.txt")
 
     if failed_transfers:
-        with open("results/failedTransfers.txt", "w") as f:
-            for address, amount in failed_transfers:
-                f.write(f"{address}, {amount}\n")
+        with open(os.path.join(results_dir, "failedTransfers.txt"), "w") as f:
+            for address, amount_wei in failed_transfers:
+                f.write(f"{address}, {format_wei(amount_wei)}\n")
         logger.warning(
             f"{len(failed_transfers)} transfers failed - saved to failedTransfers.txt"
         )
 
     successful = len(results) - len(failed_transfers)
     logger.info("Transfer Summary:")
+    logger.info(f"Loaded: {ingest.rows_read}")
     logger.info(f"Successful: {successful}")
     logger.info(f"Failed: {len(failed_transfers)}")
     logger.info(f"Total processed: {len(results)}")
 
+    return results
+
+
+def one_to_many_sharded(
+    hot_wallets: int = HOT_WALLETS,
+    data_path: str = "data/data.txt",
+    network: Network = Networks.Monad,
+    results_dir: str = "results",
+    coalesce: bool = False,
+):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.actions.hot_wallets import (
+        fund_hot_wallets,
+        load_hot_keys,
+        shard_rows,
+        sweep_back,
+        write_shard,
+    )
+    from src.actions.transfer import Transfer
+    from src.utils.address_cache.address_cache import derive_addresses
+    from src.utils.ingest.ingest import TransferIngest
 
-def many_to_one():
-    from itertools import cycle
+    if not os.path.exists(data_path):
+        logger.error(f"{data_path} not found!")
+        return
 
-    results = []
+    ingest = TransferIngest(data_path)
+    rows = ingest.coalesced() if coalesce else list(ingest)
+    if not rows:
+        logger.error("No valid transfer data found!")
+        return
+    if ingest.skipped:
+        logger.warning(f"Skipped {len(ingest.skipped)} invalid lines")
 
-    try:
-        with open("data/private_keys.txt", "r") as f:
-            private_keys = f.read().splitlines()
-    except FileNotFoundError:
-        logger.error("private_keys.txt not found!")
+    admin = Transfer(
+        account_name=ACCOUNT_NAME, private_key=PRIVATE_KEY, network=network
+    )
+    hot_keys = load_hot_keys(hot_wallets)
+    hot_addresses = derive_addresses(hot_keys)
+    shards = shard_rows(rows, len(hot_keys))
+    logger.info(
+        f"Split {len(rows)} transfers across {len(hot_keys)} hot wallets: {', '.join(str(len(shard)) for shard in shards)}"
+    )
+
+    if not fund_hot_wallets(admin, hot_addresses, shards):
+        logger.error("Hot wallets could not be funded, nothing was sent to recipients")
         return
 
-    try:
-        with open("data/proxies.txt", "r") as f:
-            proxies = f.read().splitlines()
-    except FileNotFoundError:
-        logger.error("proxies.txt not found!")
+    def run_shard(i):
+        if not shards[i]:
+            return []
+        # Every hot wallet is an ordinary one-to-many run with its own nonce
+        # stream, journal entries and result files
+        shard_dir = os.path.join(results_dir, "shards", hot_addresses[i])
+        os.makedirs(shard_dir, exist_ok=True)
+        shard_path = os.path.join(shard_dir, "data.txt")
+        write_shard(shards[i], shard_path)
+        # A failed shard only costs its own wallet's sweep-back, its state is
+        # unknown so it is reported like one with transfers still in flight
+        try:
+            return one_to_many(
+                data_path=shard_path,
+                network=network,
+                results_dir=shard_dir,
+                private_key=hot_keys[i],
+                account_name=f"hot wallet {i + 1}",
+            )
+        except Exception as e:
+            logger.error(f"{hot_addresses[i]} | Shard failed: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(
+        max_workers=len(hot_keys), thread_name_prefix="shard"
+    ) as executor:
+        reports = list(executor.map(run_shard, range(len(hot_keys))))
+
+    # A wallet with transfers still in the mempool is left alone, sweeping it
+    # now would race them for the same balance
+    settled = [
+        i
+        for i, report in enumerate(reports)
+        if report is not None and not any(" - TIMEOUT - " in line for line in report)
+    ]
+    for i in set(range(len(hot_keys))) - set(settled):
+        logger.warning(
+            f"{hot_addresses[i]} | Hot wallet failed or has unsettled transfers, not sweeping it back"
+        )
+
+    results = [line for report in reports for line in report or []]
+    results += sweep_back(
+        admin,
+        [hot_keys[i] for i in settled],
+        [hot_addresses[i] for i in settled],
+        workers=len(hot_keys),
+    )
+
+    with open(os.path.join(results_dir, "shardedResults.txt"), "a") as f:
+        for line in results:
+            f.write(line + "\n")
+    logger.info("Results saved to shardedResults.txt")
+    return results
+
+
+def many_to_one(
+    workers: int = MANY_TO_ONE_WORKERS,
+    network: Network = Networks.Binance,
+    keys_path: str = "data/private_keys.txt",
+    proxies_path: str = "data/proxies.txt",
+    results_dir: str = "results",
+    dust_floor: int = SWEEP_DUST_FLOOR,
+):
+    from src.actions.sweep_planner import plan_sweeps
+    from src.actions.transfer import Transfer
+    from src.actions.wallet_runner import prefetch_nonces, run_wallets
+    from src.utils.address_cache.address_cache import load_addresses
+    from src.utils.journal.journal import TransferJournal
+
+    private_keys = read_lines(keys_path)
+    proxies = read_lines(proxies_path)
+    if private_keys is None or proxies is None:
         return
 
-    proxy_cycle = cycle(proxies)
-    transfer = Transfer(network=Networks.Binance)
+    addresses = load_addresses(private_keys)
+    client = Transfer(network=network)
+    journal = TransferJournal(run_id=RUN_ID)
+    wallets, skipped = unswept_wallets(
+        journal, client, private_keys, addresses, proxies
+    )
 
-    for account_name, private_key in enumerate(private_keys, start=1):
-        try:
-            transfer.update_wallet(account_name, private_key, next(proxy_cycle))
-            result = transfer.perform(TARGET_ADDRESS, None)
+    plans, dropped = plan_sweeps(client, wallets, TARGET_ADDRESS, dust_floor)
+    skipped += dropped
+    plans = {plan.address: plan for plan in plans}
+    prefetch_nonces(client, list(plans))
+
+    def sweep(transfer):
+        transfer.journal = journal
+        result = transfer.perform_planned(plans[transfer.address].tx_data)
+        if not result:
+            return f"{transfer.address} - Failed - none"
+        return record_sweep(
+            journal,
+            transfer.address,
+            network.name,
+            result,
+            transfer.landed_state(result),
+        )
 
-            if result:
-                results.append(f"{transfer.address} - Success - {result}")
-            else:
-                results.append(f"{transfer.address} - Failed - none")
+    results = skipped + run_wallets(
+        [
+            (plan.account_name, plan.private_key, plan.proxy, plan.address)
+            for plan in plans.values()
+        ],
+        network,
+        sweep,
+        workers,
+    )
 
-        except Exception as e:
-            results.append(f"Account {account_name} - Error - {str(e)}")
+    if results:
+        with open(os.path.join(results_dir, "manyToOneResults.txt"), "a") as f:
+            for line in results:
+                f.write(line + "\n")
+
+
+async def async_many_to_one(
+    concurrency: int = ASYNC_CONCURRENCY,
+    network: Network = Networks.Binance,
+    keys_path: str = "data/private_keys.txt",
+    proxies_path: str = "data/proxies.txt",
+    results_dir: str = "results",
+    dust_floor: int = SWEEP_DUST_FLOOR,
+):
+    from src.actions.async_transfer import AsyncTransfer
+    from src.actions.sweep_planner import plan_sweeps
+    from src.actions.transfer import Transfer
+    from src.actions.wallet_runner import prefetch_nonces
+    from src.utils.address_cache.address_cache import load_addresses
+    from src.utils.journal.journal import TransferJournal
+
+    private_keys = read_lines(keys_path)
+    proxies = read_lines(proxies_path)
+    if private_keys is None or proxies is None:
+        return
+
+    addresses = load_addresses(private_keys)
+    client = Transfer(network=network)
+    journal = TransferJournal(run_id=RUN_ID)
+    wallets, skipped = unswept_wallets(
+        journal, client, private_keys, addresses, proxies
+    )
+
+    plans, dropped = plan_sweeps(client, wallets, TARGET_ADDRESS, dust_floor)
+    skipped += dropped
+    prefetch_nonces(client, [plan.address for plan in plans])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sweep(plan):
+        async with semaphore:
+            try:
+                transfer = AsyncTransfer(
+                    account_name=plan.account_name,
+                    private_key=plan.private_key,
+                    network=network,
+                    proxy=plan.proxy,
+                    address=plan.address,
+                )
+                transfer.journal = journal
+                result = await transfer.perform_planned(plan.tx_data)
+                if not result:
+                    return f"{transfer.address} - Failed - none"
+                return record_sweep(
+                    journal,
+                    transfer.address,
+                    network.name,
+                    result,
+                    await transfer.landed_state(result),
+                )
 
-        sleeping(1)
+            except Exception as e:
+                return f"Account {plan.account_name} - Error - {str(e)}"
+
+    logger.info(
+        f"Sweeping {len(plans)} wallets with up to {concurrency} running at once"
+    )
+    results = skipped + await asyncio.gather(*(sweep(plan) for plan in plans))
+
+    if results:
+        with open(os.path.join(results_dir, "manyToOneResults.txt"), "a") as f:
+            for line in results:
+                f.write(line + "\n")
+
+
+def plan_batch(
+    data_path: str = "data/data.txt",
+    out_path: str = BATCH_FILE_PATH,
+    network: Network = Networks.Monad,
+    coalesce: bool = False,
+    results_dir: str = "results",
+):
+    from src.actions.offline import plan
+    from src.actions.transfer import Transfer
+    from src.utils.ingest.ingest import TransferIngest
+    from collections import Counter
+    from src.utils.journal.journal import TransferJournal, journal_amount
+
+    if not os.path.exists(data_path):
+        logger.error(f"{data_path} not found!")
+        return
+
+    ingest = TransferIngest(data_path)
+    transfer = Transfer(
+        account_name=ACCOUNT_NAME, private_key=PRIVATE_KEY, network=network
+    )
+    journal = TransferJournal(run_id=RUN_ID)
+    processed_addresses, _ = load_processed_addresses(
+        journal, transfer, transfer.address
+    )
+
+    transfers = []
+    occurrences = Counter()
+    for row in ingest.coalesced() if coalesce else ingest:
+        seen = (row.address.lower(), row.amount_wei)
+        entry_amount = journal_amount(row.amount_wei, occurrences[seen])
+        occurrences[seen] += 1
+        key = (transfer.address.lower(), row.address.lower(), entry_amount)
+        if key not in processed_addresses:
+            transfers.append((row.address, row.amount_wei, entry_amount))
+    if ingest.skipped:
+        logger.warning(f"Skipped {len(ingest.skipped)} invalid lines")
+    write_merge_report(ingest, results_dir, network.token)
+
+    plan(transfer, transfers, out_path, journal)
+
+
+def broadcast_batch(
+    batch_path: str = BATCH_FILE_PATH,
+    network: Network = Networks.Monad,
+    results_dir: str = "results",
+):
+    from src.actions.offline import broadcast
+    from src.actions.transfer import Transfer
+    from src.utils.journal.journal import TransferJournal
+
+    if not os.path.exists(batch_path):
+        logger.error(f"{batch_path} not found!")
+        return
+
+    transfer = Transfer(network=network)
+    journal = TransferJournal(run_id=RUN_ID)
+    results = broadcast(transfer, batch_path, journal)
 
     if results:
-        with open("results/manyToOneResults.txt", "a") as f:
+        with open(os.path.join(results_dir, "oneToManyResults.txt"), "a") as f:
             for line in results:
                 f.write(line + "\n")
+        logger.info("Results saved to oneToManyResults.txt")
+
+
+def one_to_many_fanout(
+    networks: list[Network],
+    disperse: bool = False,
+    data_path: str = "data/data.txt",
+    results_dir: str = "results",
+    coalesce: bool = False,
+):
+    from src.actions.fanout import run_on_networks, write_report
+
+    def job(network):
+        # Every chain writes its own result files, the combined report goes on top
+        chain_dir = os.path.join(results_dir, str(network.chain_id))
+        os.makedirs(chain_dir, exist_ok=True)
+        return one_to_many(
+            disperse=disperse,
+            data_path=data_path,
+            network=network,
+            results_dir=chain_dir,
+            coalesce=coalesce,
+        )
 
+    reports = run_on_networks(networks, job)
+    write_report(reports, os.path.join(results_dir, "fanoutReport.txt"))
+    logger.info("Combined report saved to fanoutReport.txt")
 
-def main():
-    choice = choose_mode()
 
-    match choice:
-        case 1:
-            one_to_many()
-        case 2:
-            many_to_one()
+def check_transfer_file(
+    data_path: str, network: Network, summarize: bool, coalesce: bool = False
+) -> bool:
+    from src.utils.ingest.ingest import TransferIngest, format_wei
+
+    if not os.path.exists(data_path):
+        logger.error(f"{data_path} not found!")
+        return False
+
+    ingest = TransferIngest(data_path)
+    rows = ingest.coalesced() if coalesce else list(ingest)
+    total_wei = sum(row.amount_wei for row in rows)
+
+    logger.info(
+        f"{data_path}: {ingest.rows_read} valid rows, {len(ingest.skipped)} invalid, {len(ingest.duplicates)} repeated recipients"
+    )
+    if summarize:
+        logger.info(
+            f"Would send {len(rows)} transfers totalling {format_wei(total_wei)} {network.token} on {network.name}"
+        )
+    return ingest.rows_read > 0 and not ingest.skipped
+
+
+def check_key_file(keys_path: str, network: Network, summarize: bool) -> bool:
+    private_keys = read_lines(keys_path)
+    if private_keys is None:
+        return False
+
+    # Format check only, deriving the accounts would need eth_account
+    invalid = []
+    for line_num, private_key in enumerate(private_keys, start=1):
+        body = private_key[2:] if private_key.startswith("0x") else private_key
+        if len(body) != 64 or any(c not in "0123456789abcdefABCDEF" for c in body):
+            invalid.append(line_num)
+
+    logger.info(f"{keys_path}: {len(private_keys)} keys, {len(invalid)} malformed")
+    if invalid:
+        logger.error(f"Malformed keys on lines {invalid[:20]}")
+    if summarize:
+        logger.info(
+            f"Would sweep {len(private_keys) - len(invalid)} wallets to {TARGET_ADDRESS} on {network.name}"
+        )
+    return bool(private_keys) and not invalid and TARGET_ADDRESS is not None
+
+
+def check_batch_file(batch_path: str, network: Network, summarize: bool) -> bool:
+    try:
+        with open(batch_path, "r") as f:
+            header = json.loads(f.readline())
+            entries = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        logger.error(f"{batch_path} not found!")
+        return False
+    except json.JSONDecodeError as e:
+        logger.error(f"{batch_path} is not a signed batch: {str(e)}")
+        return False
+
+    logger.info(
+        f"{batch_path}: {len(entries)} signed transactions from {header.get('from')} for chain {header.get('chainId')}"
+    )
+    if header.get("chainId") != network.chain_id:
+        logger.error(
+            f"Batch was signed for chain {header.get('chainId')}, {network.name} is {network.chain_id}"
+        )
+        return False
+    if summarize and entries:
+        logger.info(
+            f"Would broadcast nonces {entries[0][0]}-{entries[-1][0]} on {network.name}"
+        )
+    return bool(entries)
+
+
+def check_inputs(args, summarize: bool = False) -> bool:
+    match args.mode:
+        case "many-to-one" | "many-to-one-async":
+            return check_key_file(args.keys, args.network, summarize)
+        case "broadcast":
+            return check_batch_file(args.batch_file, args.network, summarize)
+        case "fanout":
+            if summarize:
+                logger.info(
+                    f"Would run on {', '.join(network.name for network in args.networks)}"
+                )
+            return check_transfer_file(
+                args.input, args.networks[0], summarize, args.merge_duplicates
+            )
+        case _:
+            return check_transfer_file(
+                args.input, args.network, summarize, args.merge_duplicates
+            )
+
+
+def run(args) -> None:
+    match args.mode:
+        case "one-to-many":
+            one_to_many(
+                data_path=args.input,
+                network=args.network,
+                results_dir=args.output,
+                coalesce=args.merge_duplicates,
+            )
+        case "disperse":
+            one_to_many(
+                disperse=True,
+                data_path=args.input,
+                network=args.network,
+                results_dir=args.output,
+                coalesce=args.merge_duplicates,
+            )
+        case "many-to-one":
+            many_to_one(
+                workers=args.workers or MANY_TO_ONE_WORKERS,
+                network=args.network,
+                keys_path=args.keys,
+                proxies_path=args.proxies,
+                results_dir=args.output,
+                dust_floor=args.dust_floor,
+            )
+        case "many-to-one-async":
+            asyncio.run(
+                async_many_to_one(
+                    concurrency=args.workers or ASYNC_CONCURRENCY,
+                    network=args.network,
+                    keys_path=args.keys,
+                    proxies_path=args.proxies,
+                    results_dir=args.output,
+                    dust_floor=args.dust_floor,
+                )
+            )
+        case "plan":
+            plan_batch(
+                data_path=args.input,
+                out_path=args.batch_file,
+                network=args.network,
+                coalesce=args.merge_duplicates,
+                results_dir=args.output,
+            )
+        case "broadcast":
+            broadcast_batch(
+                batch_path=args.batch_file,
+                network=args.network,
+                results_dir=args.output,
+            )
+        case "sharded":
+            one_to_many_sharded(
+                hot_wallets=args.hot_wallets,
+                data_path=args.input,
+                network=args.network,
+                results_dir=args.output,
+                coalesce=args.merge_duplicates,
+            )
+        case "fanout":
+            one_to_many_fanout(
+                args.networks,
+                data_path=args.input,
+                results_dir=args.output,
+                coalesce=args.merge_duplicates,
+            )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Send native tokens from one wallet to many, or sweep many wallets into one"
+    )
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=list(MODES),
+        help="what to run, asks interactively when left out",
+    )
+    parser.add_argument(
+        "--network",
+        type=resolve_network,
+        help="network name or chain id (Monad Testnet, or Binance Smart Chain for sweeps, by default)",
+    )
+    parser.add_argument(
+        "--networks",
+        help="comma-separated networks for fanout (default: FANOUT_NETWORKS or Monad)",
+    )
+    parser.add_argument("--input", default="data/data.txt", help="transfer list")
+    parser.add_argument(
+        "--merge-duplicates",
+        action="store_true",
+        help="send one transfer per recipient, summing the amounts of repeated rows",
+    )
+    parser.add_argument("--keys", default="data/private_keys.txt")
+    parser.add_argument("--proxies", default="data/proxies.txt")
+    parser.add_argument(
+        "--output", default="results", help="directory for result files"
+    )
+    parser.add_argument("--batch-file", default=BATCH_FILE_PATH)
+    parser.add_argument(
+        "--hot-wallets",
+        type=int,
+        default=HOT_WALLETS,
+        help="wallets the sharded mode funds and sends from in parallel",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="wallets processed at once in sweep modes"
+    )
+    parser.add_argument(
+        "--dust-floor",
+        type=native_amount,
+        default=SWEEP_DUST_FLOOR,
+        help="sweep modes skip wallets that would send this much or less, in native token units",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="journal run id to resume (default: RUN_ID or a new id per run)",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="check the input files and exit, nothing touches the network",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="validate and print what would be sent, nothing touches the network",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=os.environ.get("METRICS_PORT")
+    )
+    parser.add_argument("--metrics-json", default=METRICS_JSON_PATH)
+
+    args = parser.parse_args(argv)
+    if args.networks is None:
+        args.networks = os.environ.get("FANOUT_NETWORKS", Networks.Monad.name)
+    try:
+        args.networks = [
+            resolve_network(name.strip()) for name in args.networks.split(",")
+        ]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    global RUN_ID
+
+    args = parse_args(argv)
+    if args.mode is None:
+        args.mode = choose_mode()
+    if args.network is None:
+        args.network = DEFAULT_NETWORKS.get(args.mode, Networks.Monad)
+    if args.run_id:
+        RUN_ID = args.run_id
+
+    if args.validate_only or args.dry_run:
+        return 0 if check_inputs(args, summarize=args.dry_run) else 1
+
+    from src.utils.metrics.metrics import metrics
+
+    logger.info(f"Journal run id {RUN_ID}, pass --run-id {RUN_ID} to resume this run")
+    if args.metrics_port:
+        metrics.serve(int(args.metrics_port))
+
+    try:
+        run(args)
+    finally:
+        metrics.dump_json(args.metrics_json)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
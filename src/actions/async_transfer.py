@@ -0,0 +1,115 @@
+from ..client.async_evm_client import AsyncEvmClient
+from ..models.networks import Networks
+from ..utils.decorator.decorators import async_retry_execution
+from ..utils.ingest.ingest import format_wei
+from ..utils.journal.journal import BROADCAST, CONFIRMED, FAILED, SIGNED
+from loguru import logger
+
+
+class AsyncTransfer(AsyncEvmClient):
+
+    def __init__(
+        self,
+        account_name=None,
+        private_key=None,
+        network=Networks.Monad,
+        user_agent=None,
+        proxy=None,
+        address=None,
+    ):
+        super().__init__(account_name, private_key, network, user_agent, proxy, address)
+        self.module_name = "AsyncTransfer"
+
+    @async_retry_execution
+    async def perform(
+        self,
+        recipient_address: str,
+        amount_wei: int | None = None,
+        journal_amount: int | str | None = None,
+    ) -> str:
+        if not self.w3.is_checksum_address(recipient_address):
+            recipient_address = self.w3.to_checksum_address(recipient_address)
+
+        logger.info(
+            f"{self.account_name} | {self.address} | Sending {format_wei(amount_wei) if amount_wei else 'full balance'} {self.network.token} to {recipient_address}"
+        )
+
+        if not amount_wei:
+            tx_data = await self.get_tx_params(
+                to_address=recipient_address,
+                data="0x",
+                value=0,
+                default_gas=25000,
+                eip_1559=False,
+                estimate_gas=True,
+                is_for_contract_tx=False,
+                full_balance=True,
+            )
+        else:
+            tx_data = await self.get_tx_params(
+                to_address=recipient_address,
+                data="0x",
+                value=int(amount_wei),
+                default_gas=25000,
+                eip_1559=False,
+                estimate_gas=True,
+                is_for_contract_tx=False,
+                full_balance=False,
+            )
+
+        if not tx_data or tx_data["value"] <= 0:
+            if tx_data and self.nonce_manager:
+                self.nonce_manager.release(tx_data["nonce"])
+            logger.warning(
+                f"{self.account_name} | {self.address}: Does not have enough {self.network.token} to cover the network fee"
+            )
+            return
+
+        return await self._sign_and_send(
+            tx_data, journal_amount or (amount_wei if amount_wei else "full")
+        )
+
+    @async_retry_execution
+    async def perform_planned(
+        self, tx_data: dict, journal_amount: int | str = "full"
+    ) -> str:
+        # Balance, fee and gas were settled by the sweep planner, only the nonce
+        # is taken here so a retried attempt gets a fresh one
+        tx_data = dict(tx_data, nonce=await self.allocate_nonce())
+        logger.info(
+            f"{self.account_name} | {self.address} | Sending {format_wei(tx_data['value'])} {self.network.token} to {tx_data['to']}"
+        )
+        return await self._sign_and_send(tx_data, journal_amount)
+
+    async def _sign_and_send(self, tx_data: dict, journal_amount: int | str) -> str:
+        signed = self.sign_transaction(tx_dict=tx_data)
+        if not signed:
+            raise Exception(
+                "Failed to sign transaction, most likely transaction parameters are invalid"
+            )
+        self._journal_mark(tx_data["to"], journal_amount, SIGNED, signed.hash.hex())
+
+        try:
+            tx_hash = await self.broadcast(signed)
+        except Exception as e:
+            self.handle_send_error(e, tx_data["nonce"])
+            raise Exception(
+                "Failed to get transaction hash, transaction most likely didnt get to the mempool"
+            ) from e
+        self._journal_mark(tx_data["to"], journal_amount, BROADCAST, tx_hash.hex())
+
+        return await self.confirm_tx(tx_hash)
+
+    def _journal_mark(self, recipient, amount, state, tx_hash=None):
+        if self.journal is not None:
+            self.journal.mark(
+                self.network.name, self.address, recipient, amount, state, tx_hash
+            )
+
+    async def landed_state(self, tx_hash: str) -> str:
+        # Same rule as Transfer.landed_state
+        try:
+            receipt = await self.get_tx_receipt(tx_hash)
+        except Exception:
+            return BROADCAST
+        return CONFIRMED if receipt["status"] == 1 else FAILED
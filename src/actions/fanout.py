@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+from loguru import logger
+from ..models.networks import Network
+
+
+@dataclass
+class NetworkReport:
+    network: str
+    results: list[str] = field(default_factory=list)
+    error: str | None = None
+    elapsed: float = 0.0
+
+
+def run_on_networks(
+    networks: list[Network],
+    job: Callable[[Network], list[str] | None],
+    workers: int | None = None,
+) -> list[NetworkReport]:
+    # Nonce streams, fee quotes and endpoint pools are all keyed by chain, so each
+    # worker only ever touches its own chain's state
+    def work(network: Network) -> NetworkReport:
+        started_at = time.monotonic()
+        try:
+            results = job(network) or []
+            return NetworkReport(
+                network.name, results, elapsed=time.monotonic() - started_at
+            )
+        except Exception as e:
+            logger.error(f"{network.name} | Job failed: {str(e)}")
+            return NetworkReport(
+                network.name, error=str(e), elapsed=time.monotonic() - started_at
+            )
+
+    logger.info(
+        f"Running on {len(networks)} networks: {', '.join(n.name for n in networks)}"
+    )
+    with ThreadPoolExecutor(
+        max_workers=workers or len(networks), thread_name_prefix="network"
+    ) as executor:
+        return list(executor.map(work, networks))
+
+
+def write_report(reports: list[NetworkReport], path: str) -> None:
+    with open(path, "a") as f:
+        for report in reports:
+            status = f"ERROR - {report.error}" if report.error else "DONE"
+            f.write(
+                f"# {report.network} - {status} - {len(report.results)} results in {report.elapsed:.1f}s\n"
+            )
+            for line in report.results:
+                f.write(f"{report.network} - {line}\n")
+
+    for report in reports:
+        logger.info(
+            f"{report.network}: {len(report.results)} results in {report.elapsed:.1f}s{' - ' + report.error if report.error else ''}"
+        )
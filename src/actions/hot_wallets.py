@@ -0,0 +1,141 @@
+import os
+from eth_account import Account
+from loguru import logger
+from .sweep_planner import plan_sweeps
+from .transfer import Transfer
+from .wallet_runner import prefetch_nonces, run_wallets
+from ..client.receipt_tracker import ReceiptTracker
+from ..config.constants import (
+    GAS_PRICE_MULTIPLIER,
+    HOT_WALLET_FEE_MARGIN,
+    HOT_WALLETS_PATH,
+    TRANSFER_GAS,
+)
+from ..utils.ingest.ingest import TransferRow, format_wei
+from ..utils.journal.journal import CONFIRMED
+
+
+def load_hot_keys(count: int, path: str = HOT_WALLETS_PATH) -> list[str]:
+    # Keys are kept between runs so a resumed run sends from the same wallets
+    # and anything left on them can still be swept back
+    keys = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            keys = [line.strip() for line in f if line.strip()]
+
+    if len(keys) < count:
+        created = [Account.create().key.hex() for _ in range(count - len(keys))]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        with os.fdopen(fd, "a") as f:
+            for key in created:
+                f.write(key + "\n")
+        logger.info(f"Created {len(created)} hot wallets, keys saved to {path}")
+        keys += created
+
+    return keys[:count]
+
+
+def shard_rows(rows: list[TransferRow], count: int) -> list[list[TransferRow]]:
+    # A recipient always lands on the same hot wallet, so the journal of a
+    # resumed run lines up with the wallet that sent it
+    shards = [[] for _ in range(count)]
+    for row in rows:
+        shards[int(row.address, 16) % count].append(row)
+    return shards
+
+
+def write_shard(rows: list[TransferRow], path: str) -> None:
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(f"{row.address},{format_wei(row.amount_wei)}\n")
+
+
+def fund_hot_wallets(
+    admin: Transfer, addresses: list[str], shards: list[list[TransferRow]]
+) -> bool:
+    gas_price = int(admin.fee_oracle.gas_price(admin.w3) * GAS_PRICE_MULTIPLIER)
+    balances = admin.get_balances(addresses)
+
+    top_ups = []
+    for address, rows, balance in zip(addresses, shards, balances):
+        if not rows:
+            continue
+        if balance is None:
+            logger.error(f"{address} | Could not read hot wallet balance")
+            return False
+        need = sum(row.amount_wei for row in rows) + int(
+            len(rows) * TRANSFER_GAS * gas_price * HOT_WALLET_FEE_MARGIN
+        )
+        if need > balance:
+            top_ups.append((address, need - balance))
+
+    if not top_ups:
+        logger.info("Hot wallets already hold enough for their shards")
+        return True
+
+    total = sum(amount for _, amount in top_ups)
+    logger.info(
+        f"{admin.address} | Funding {len(top_ups)} hot wallets with {format_wei(total)} {admin.network.token}"
+    )
+
+    if admin.network.disperse_contract:
+        funded = admin.perform_disperse(top_ups)
+        return all(state == CONFIRMED for _, _, state, _ in funded)
+
+    # Without a disperse contract the top ups go out back to back on
+    # consecutive nonces and are confirmed together
+    outcomes = []
+    tracker = ReceiptTracker(
+        transport=admin.batch_transport,
+        on_result=outcomes.append,
+        on_block=admin.fee_oracle.observe_block,
+        monitor=admin.tx_monitor,
+    )
+    admin.receipt_tracker = tracker
+    try:
+        for address, amount in top_ups:
+            admin.perform(address, amount, tx_context=address)
+    finally:
+        admin.receipt_tracker = None
+        tracker.stop()
+
+    confirmed = {
+        outcome.context
+        for outcome in outcomes
+        if outcome.status == ReceiptTracker.SUCCESS
+    }
+    for address, amount in top_ups:
+        if address not in confirmed:
+            logger.error(
+                f"{address} | Funding with {format_wei(amount)} {admin.network.token} did not confirm"
+            )
+    return len(confirmed) == len(top_ups)
+
+
+def sweep_back(
+    admin: Transfer, hot_keys: list[str], addresses: list[str], workers: int
+) -> list[str]:
+    wallets = [
+        (f"hot wallet {i}", private_key, None, address)
+        for i, (private_key, address) in enumerate(zip(hot_keys, addresses), start=1)
+    ]
+    plans, skipped = plan_sweeps(admin, wallets, admin.address)
+    plans = {plan.address: plan for plan in plans}
+    prefetch_nonces(admin, list(plans))
+
+    def sweep(transfer: Transfer) -> str:
+        result = transfer.perform_planned(plans[transfer.address].tx_data)
+        if result:
+            return f"{transfer.address} - Swept back - {result}"
+        return f"{transfer.address} - Sweep failed - none"
+
+    return skipped + run_wallets(
+        [
+            (plan.account_name, plan.private_key, plan.proxy, plan.address)
+            for plan in plans.values()
+        ],
+        admin.network,
+        sweep,
+        workers,
+    )
@@ -0,0 +1,215 @@
+import json
+import time
+from typing import Iterable
+from loguru import logger
+from web3 import Web3
+from .transfer import Transfer
+from ..client.nonce_manager import is_nonce_error
+from ..client.receipt_tracker import ReceiptTracker
+from ..client.retry_policy import RATE_LIMITED, TRANSIENT, classify_error
+from ..client.signing_pool import sign_transactions
+from ..config.constants import BROADCAST_BATCH_SIZE, GAS_PRICE_MULTIPLIER
+from ..utils.ingest.ingest import format_wei
+from ..utils.journal.journal import (
+    BROADCAST,
+    CONFIRMED,
+    FAILED,
+    SIGNED,
+    TransferJournal,
+)
+
+
+def plan(
+    transfer: Transfer,
+    transfers: Iterable[tuple[str, int, str]],
+    out_path: str,
+    journal: TransferJournal | None = None,
+) -> int:
+    transfers = list(transfers)
+    if not transfers:
+        logger.error("Nothing to plan")
+        return 0
+
+    # State is read once: one balance, one fee quote, one pending nonce, and one
+    # batched code lookup so only contract recipients need a gas estimate
+    balance = transfer.get_balance()
+    gas_price = int(transfer.fee_oracle.gas_price(transfer.w3) * GAS_PRICE_MULTIPLIER)
+    transfer.classify_recipients([address for address, _, _ in transfers])
+
+    tx_dicts = []
+    planned = []
+    for address, amount_wei, entry_amount in transfers:
+        tx_params = {
+            "from": transfer.address,
+            "to": Web3.to_checksum_address(address),
+            "value": int(amount_wei),
+        }
+        try:
+            gas = transfer.estimate_tx_gas(tx_params)
+        except Exception as e:
+            logger.error(f"{address} | Gas estimation failed, not planned: {str(e)}")
+            continue
+
+        tx_dicts.append(
+            dict(
+                tx_params,
+                gas=gas,
+                gasPrice=gas_price,
+                chainId=transfer.chain_id,
+                nonce=transfer.allocate_nonce(),
+            )
+        )
+        planned.append(entry_amount)
+
+    if not tx_dicts:
+        logger.error("Nothing to plan")
+        return 0
+
+    total_cost = sum(tx["value"] + tx["gas"] * tx["gasPrice"] for tx in tx_dicts)
+    if total_cost > balance:
+        logger.warning(
+            f"{transfer.address} | Batch needs {format_wei(total_cost)} {transfer.network.token} but balance is {format_wei(balance)}, later transactions will fail"
+        )
+
+    raw_transactions = sign_transactions(tx_dicts, transfer.private_key)
+
+    with open(out_path, "w") as f:
+        f.write(
+            json.dumps(
+                {
+                    "network": transfer.network.name,
+                    "chainId": transfer.chain_id,
+                    "from": transfer.address,
+                    "count": len(tx_dicts),
+                }
+            )
+            + "\n"
+        )
+        for tx, raw, entry_amount in zip(tx_dicts, raw_transactions, planned):
+            tx_hash = Web3.keccak(raw).hex()
+            # The journal amount goes last so batches written before it still load
+            f.write(
+                json.dumps(
+                    [
+                        tx["nonce"],
+                        tx["to"],
+                        str(tx["value"]),
+                        tx_hash,
+                        raw.hex(),
+                        entry_amount,
+                    ]
+                )
+                + "\n"
+            )
+            if journal is not None:
+                journal.mark(
+                    transfer.network.name,
+                    transfer.address,
+                    tx["to"],
+                    entry_amount,
+                    SIGNED,
+                    tx_hash,
+                )
+
+    logger.success(
+        f"{transfer.address} | Planned {len(tx_dicts)} signed transactions (nonces {tx_dicts[0]['nonce']}-{tx_dicts[-1]['nonce']}) to {out_path}"
+    )
+    return len(tx_dicts)
+
+
+def load_batch(path: str) -> tuple[dict, list[list]]:
+    with open(path, "r") as f:
+        header = json.loads(f.readline())
+        entries = [json.loads(line) for line in f if line.strip()]
+    # Entries are nonce, to, value, tx hash, raw tx and the journal amount
+    return header, [
+        entry if len(entry) > 5 else entry + [entry[2]] for entry in entries
+    ]
+
+
+def broadcast(
+    transfer: Transfer,
+    path: str,
+    journal: TransferJournal | None = None,
+) -> list[str]:
+    header, entries = load_batch(path)
+    if header["chainId"] != transfer.chain_id:
+        raise ValueError(
+            f"Batch was signed for chain {header['chainId']}, client is on {transfer.chain_id}"
+        )
+
+    sender = header["from"]
+    results = []
+
+    def on_receipt(outcome):
+        nonce, to, value = outcome.context
+        status = CONFIRMED if outcome.status == ReceiptTracker.SUCCESS else FAILED
+        if journal is not None and outcome.status != ReceiptTracker.TIMEOUT:
+            journal.mark(
+                transfer.network.name, sender, to, value, status, outcome.tx_hash
+            )
+        results.append(f"{to} - {outcome.status.upper()} - {outcome.tx_hash}")
+
+    tracker = ReceiptTracker(
+        transport=transfer.batch_transport,
+        on_result=on_receipt,
+        on_block=transfer.fee_oracle.observe_block,
+    )
+
+    # Raw transactions are pushed in JSON-RPC batches, paced by the endpoint's
+    # rate limiter inside the transport. Transient and rate limited rejections
+    # are sent again with the same raw transaction, so no nonce is left as a gap
+    pending = entries
+    attempt = 0
+    while pending:
+        retry = []
+        for i in range(0, len(pending), BROADCAST_BATCH_SIZE):
+            chunk = pending[i : i + BROADCAST_BATCH_SIZE]
+            try:
+                replies = transfer.batch_transport.call_many(
+                    ("eth_sendRawTransaction", [raw]) for _, _, _, _, raw, _ in chunk
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Broadcast of {len(chunk)} transactions failed: {str(e)}"
+                )
+                replies = [e] * len(chunk)
+
+            for entry, reply in zip(chunk, replies):
+                nonce, to, _, tx_hash, _, value = entry
+                # A nonce error here usually means the same transaction already
+                # landed on a previous attempt, so the receipt decides what happened
+                if isinstance(reply, Exception) and not is_nonce_error(reply):
+                    kind = classify_error(reply)
+                    if kind in (TRANSIENT, RATE_LIMITED) and (
+                        transfer.retry_policy.should_retry(kind, attempt)
+                    ):
+                        retry.append((entry, kind))
+                        continue
+                    logger.warning(f"{to} | nonce {nonce} | Broadcast failed: {reply}")
+                    results.append(f"{to} - FAILED - {reply}")
+                    continue
+
+                if journal is not None:
+                    journal.mark(
+                        transfer.network.name, sender, to, value, BROADCAST, tx_hash
+                    )
+                tracker.track(tx_hash, context=(nonce, to, value))
+
+        logger.info(
+            f"Broadcast {len(pending) - len(retry)}/{len(pending)}"
+            + (f", retrying {len(retry)}" if retry else "")
+        )
+        if retry:
+            kind = (
+                RATE_LIMITED if any(k == RATE_LIMITED for _, k in retry) else TRANSIENT
+            )
+            time.sleep(transfer.retry_policy.delay(kind, attempt))
+            attempt += 1
+        pending = [entry for entry, _ in retry]
+
+    if tracker.in_flight:
+        logger.info(f"Waiting for {tracker.in_flight} receipts")
+    tracker.stop()
+
+    return results
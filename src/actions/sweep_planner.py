@@ -0,0 +1,132 @@
+import time
+from dataclasses import dataclass
+from loguru import logger
+from web3 import Web3
+from .transfer import Transfer
+from ..client.retry_policy import FATAL, TRANSIENT, classify_error
+from ..config.constants import (
+    BALANCE_RETRIES,
+    GAS_PRICE_MULTIPLIER,
+    SWEEP_DUST_FLOOR,
+    TRANSFER_GAS,
+)
+from ..config.transaction_config import MINIMUM_TRANSFER_REQUIREMENTS
+from ..utils.ingest.ingest import format_wei
+
+
+@dataclass
+class SweepPlan:
+    account_name: str | int
+    private_key: str
+    proxy: str | None
+    address: str
+    balance: int
+    tx_data: dict
+
+
+def _sweep_gas(client: Transfer, sender: str, recipient: str) -> int:
+    # Every wallet sends a plain transfer to the same recipient, so one gas
+    # figure covers all of them
+    try:
+        return client.estimate_tx_gas({"from": sender, "to": recipient, "value": 0})
+    except Exception as e:
+        logger.warning(f"Sweep gas estimate failed, using {TRANSFER_GAS}: {str(e)}")
+        return TRANSFER_GAS
+
+
+def _read_balances(client: Transfer, addresses: list[str]) -> list[int | None]:
+    # A failed read says nothing about the wallet, so those addresses are read
+    # again before any of them is given up on, whether a single call or the
+    # whole batch failed
+    balances = [None] * len(addresses)
+    kind = TRANSIENT
+    for attempt in range(BALANCE_RETRIES):
+        missing = [i for i, balance in enumerate(balances) if balance is None]
+        if not missing:
+            break
+        if attempt:
+            logger.warning(f"Reading {len(missing)} failed balances again")
+            time.sleep(client.retry_policy.delay(kind, attempt))
+        try:
+            read = client.get_balances([addresses[i] for i in missing])
+        except Exception as e:
+            kind = classify_error(e)
+            logger.warning(f"Balance read for {len(missing)} wallets failed: {str(e)}")
+            if kind == FATAL:
+                break
+            continue
+        kind = TRANSIENT
+        for i, balance in zip(missing, read):
+            balances[i] = balance
+    return balances
+
+
+def plan_sweeps(
+    client: Transfer,
+    wallets: list[tuple[str | int, str, str | None, str | None]],
+    recipient: str,
+    dust_floor: int = SWEEP_DUST_FLOOR,
+) -> tuple[list[SweepPlan], list[str]]:
+    # One batched balance read and one fee quote for every wallet, so empty and
+    # dust wallets are dropped before any signing or per-wallet rpc work
+    recipient = Web3.to_checksum_address(recipient)
+    known = [wallet for wallet in wallets if wallet[3] is not None]
+    skipped = [
+        f"Account {account_name} - Skipped - invalid private key"
+        for account_name, _, _, address in wallets
+        if address is None
+    ]
+    if not known:
+        return [], skipped
+
+    network = client.network
+    balances = _read_balances(client, [address for _, _, _, address in known])
+    gas_price = int(client.fee_oracle.gas_price(client.w3) * GAS_PRICE_MULTIPLIER)
+    gas = _sweep_gas(client, known[0][3], recipient)
+    fee = gas * gas_price
+
+    minimum = MINIMUM_TRANSFER_REQUIREMENTS.get(network.name, {})
+    min_network_fee = (
+        int(minimum["gas"] * minimum["gasPrice"])
+        if minimum.get("gas") is not None and minimum.get("gasPrice") is not None
+        else 0
+    )
+
+    plans = []
+    dust = 0
+    for (account_name, private_key, proxy, address), balance in zip(known, balances):
+        if balance is None:
+            skipped.append(f"{address} - Skipped - balance unavailable")
+            continue
+
+        value = balance - fee
+        if balance < min_network_fee or value <= 0 or value <= dust_floor:
+            dust += 1
+            skipped.append(
+                f"{address} - Skipped - balance {format_wei(balance)} {network.token} is dust"
+            )
+            continue
+
+        plans.append(
+            SweepPlan(
+                account_name,
+                private_key,
+                proxy,
+                address,
+                balance,
+                {
+                    "from": address,
+                    "to": recipient,
+                    "value": value,
+                    "gas": gas,
+                    "gasPrice": gas_price,
+                    "chainId": client.chain_id,
+                },
+            )
+        )
+
+    total = sum(plan.tx_data["value"] for plan in plans)
+    logger.info(
+        f"Sweep plan: {len(plans)} of {len(wallets)} wallets to sweep, {dust} empty or dust, {format_wei(total)} {network.token} in total at {gas} gas x {gas_price} wei"
+    )
+    return plans, skipped
@@ -1,18 +1,29 @@
 from ..client.evm_client import EvmClient
 from ..models.networks import Networks
 from ..utils.decorator.decorators import retry_execution
+from ..config.abi import DISPERSE_ABI
+from ..utils.journal.journal import BROADCAST, CONFIRMED, FAILED, SIGNED
+from ..utils.ingest.ingest import format_wei
+from ..config.constants import (
+    DISPERSE_BASE_GAS,
+    DISPERSE_GAS_PER_RECIPIENT,
+    DISPERSE_GAS_TARGET,
+    GAS_AMT_MULTIPLIER,
+    GAS_PRICE_MULTIPLIER,
+    RECEIPT_TIMEOUT,
+    UNDERPRICED_BUMP,
+)
+from ..client.tx_monitor import bump_fee
+from ..client.retry_policy import NONCE, UNDERPRICED, FatalError, classify_error
+from ..utils.metrics.metrics import metrics
+from collections import Counter
+from hexbytes import HexBytes
 from loguru import logger
+from typing import Any
 from web3 import Web3
-import pyuseragents
 
 
 class Transfer(EvmClient):
-    _instance = None
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
 
     def __init__(
         self,
@@ -21,57 +32,28 @@ class Transfer(EvmClient):
         network=Networks.Monad,
         user_agent=None,
         proxy=None,
+        address=None,
     ):
-        # Only initialize if not already initialized
-        if not hasattr(self, "_initialized"):
-            super().__init__(account_name, private_key, network, user_agent, proxy)
-            self._initialized = True
-
-    def update_wallet(self, account_name, private_key, proxy=None):
-        self.account_name = account_name
-        self.private_key = private_key
-        self.proxy = proxy
-
-        if self.proxy:
-            self.user_agent = pyuseragents.random()
-            self.request_kwargs = {
-                "headers": {
-                    "User-Agent": self.user_agent,
-                    "Content-Type": "application/json",
-                },
-                "proxies": {
-                    "http": self.proxy,
-                    "https": self.proxy,
-                },
-                "timeout": 60,
-            }
-
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                endpoint_uri=self.rpc,
-                request_kwargs=(
-                    self.request_kwargs if self.proxy and self.user_agent else None
-                ),
-            )
-        )
-        if self.private_key:
-            self.account = self.w3.eth.account.from_key(self.private_key)
-            self.address = self.account.address
+        super().__init__(account_name, private_key, network, user_agent, proxy, address)
 
     @retry_execution
-    def perform(self, recipient_address: str, amount: float | None = None) -> str:
+    def perform(
+        self,
+        recipient_address: str,
+        amount_wei: int | None = None,
+        tx_context: Any = None,
+        journal_amount: int | str | None = None,
+    ) -> str:
         is_checksum = self.w3.is_checksum_address(recipient_address)
 
         if not is_checksum:
             recipient_address = self.w3.to_checksum_address(recipient_address)
-        if amount and not isinstance(amount, float):
-            amount = float(amount)
 
         logger.info(
-            f"{self.account_name} | {self.address} | Sending {round(amount, 6) if amount is not None else 'full balance'} {self.network.token} to {recipient_address}"
+            f"{self.account_name} | {self.address} | Sending {format_wei(amount_wei) if amount_wei else 'full balance'} {self.network.token} to {recipient_address}"
         )
 
-        if not amount:
+        if not amount_wei:
             tx_data = self.get_tx_params(
                 to_address=recipient_address,
                 data="0x",
@@ -86,31 +68,285 @@ class Transfer(EvmClient):
             tx_data = self.get_tx_params(
                 to_address=recipient_address,
                 data="0x",
-                value=int(amount * 10**18),
+                value=int(amount_wei),
                 default_gas=25000,
                 eip_1559=False,
-                estimate_gas=False,
+                estimate_gas=True,
                 is_for_contract_tx=False,
-                full_balance=True,
+                full_balance=False,
             )
-            tx_data["gas"] = 25000
 
-        if not tx_data:
+        if not tx_data or tx_data["value"] <= 0:
+            if tx_data and self.nonce_manager:
+                self.nonce_manager.release(tx_data["nonce"])
             logger.warning(
                 f"{self.account_name} | {self.address}: Does not have enough {self.network.token} to cover the network fee"
             )
             return
 
-        signed = self.sign_transaction(tx_dict=tx_data)
+        return self._execute(
+            tx_data,
+            recipient_address,
+            journal_amount or (amount_wei if amount_wei else "full"),
+            full_balance=not amount_wei,
+            tx_context=tx_context,
+        )
+
+    @retry_execution
+    def perform_planned(
+        self,
+        tx_data: dict,
+        journal_amount: int | str = "full",
+        full_balance: bool = True,
+        tx_context: Any = None,
+    ) -> str:
+        # Balance, fee and gas were settled by a planner for many wallets at once,
+        # only the nonce is taken here so a retried attempt gets a fresh one
+        tx_data = dict(tx_data, nonce=self.allocate_nonce())
+        logger.info(
+            f"{self.account_name} | {self.address} | Sending {format_wei(tx_data['value'])} {self.network.token} to {tx_data['to']}"
+        )
+        return self._execute(
+            tx_data,
+            tx_data["to"],
+            journal_amount,
+            full_balance=full_balance,
+            tx_context=tx_context,
+        )
+
+    def _execute(
+        self,
+        tx_data: dict,
+        recipient_address: str,
+        journal_amount: int | str,
+        full_balance: bool = False,
+        tx_context: Any = None,
+    ) -> str:
+        tx_hash = self._sign_and_broadcast(
+            tx_data, recipient_address, journal_amount, full_balance=full_balance
+        )
 
-        if signed:
-            tx_hash = self.send_tx(signed_tx=signed)
-            if tx_hash is not None:
-                return tx_hash
-            else:
-                raise Exception(
-                    "Failed to get transaction hash, transaction most likely didnt get to the mempool"
+        # From here on the transaction is out, sending it again would use a new
+        # nonce while this one can still land
+        broadcast = self.tx_monitor.record(
+            tx_hash.hex(),
+            tx_data,
+            full_balance=full_balance,
+            journal_entries=[(recipient_address, journal_amount)],
+        )
+        try:
+            confirmed = self.confirm_tx(
+                tx_hash, tx_context=tx_context, broadcast=broadcast
+            )
+        except Exception as e:
+            raise FatalError(
+                f"{tx_hash.hex()} was broadcast but its receipt could not be read: {str(e)}"
+            ) from e
+        if confirmed is None:
+            raise FatalError(
+                f"{tx_hash.hex()} still pending after {RECEIPT_TIMEOUT}s, not resending"
+            )
+        return confirmed
+
+    def _sign_and_broadcast(
+        self,
+        tx_data: dict,
+        recipient_address: str,
+        journal_amount: int | str,
+        full_balance: bool = False,
+    ) -> HexBytes:
+        # Only the failed stage is redone: a nonce error re-signs with a fresh nonce,
+        # an underpriced one re-signs with a bumped fee, balance and gas estimate
+        # from the plan stay as they are
+        attempts = Counter()
+        while True:
+            signed = self.sign_transaction(tx_dict=tx_data)
+            if not signed:
+                raise FatalError(
+                    "Failed to sign transaction, most likely transaction parameters are invalid"
+                )
+            self._journal_mark(
+                recipient_address, journal_amount, SIGNED, signed.hash.hex()
+            )
+
+            try:
+                tx_hash = self.broadcast(signed)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in (NONCE, UNDERPRICED) or not (
+                    self.retry_policy.should_retry(kind, attempts[kind])
+                ):
+                    self.handle_send_error(e, tx_data["nonce"])
+                    raise
+
+                attempts[kind] += 1
+                metrics.count_retry("sign_and_broadcast", e)
+                if kind == NONCE:
+                    self.handle_send_error(e, tx_data["nonce"])
+                    tx_data["nonce"] = self.allocate_nonce()
+                else:
+                    self._bump_fee(tx_data, full_balance)
+                logger.warning(
+                    f"{self.account_name} | {self.address} | {kind} rejection, re-signing with nonce {tx_data['nonce']}: {str(e)}"
                 )
-        raise Exception(
-            "Failed to sign transaction, most likely transaction parameters are invalid"
+                continue
+
+            self._journal_mark(
+                recipient_address, journal_amount, BROADCAST, tx_hash.hex()
+            )
+            return tx_hash
+
+    def _bump_fee(self, tx_data: dict, full_balance: bool = False) -> None:
+        self.fee_oracle.invalidate()
+        market = int(self.fee_oracle.gas_price(self.w3) * GAS_PRICE_MULTIPLIER)
+        bump_fee(tx_data, UNDERPRICED_BUMP, market, full_balance)
+
+    def _journal_mark(self, recipient, amount, state, tx_hash=None):
+        if self.journal is not None:
+            self.journal.mark(
+                self.network.name, self.address, recipient, amount, state, tx_hash
+            )
+
+    def perform_disperse(
+        self,
+        transfers: list[tuple[str, int]],
+        contract_address: str | None = None,
+        gas_target: int = DISPERSE_GAS_TARGET,
+        journal_amounts: list[int | str] | None = None,
+    ) -> list[tuple[str, int, str, str | None]]:
+        # Every transfer comes back with a state: confirmed, failed, or broadcast
+        # for a chunk that went out but whose outcome is unknown and must not be
+        # sent again. Each chunk is journaled as it goes, so whatever happens to a
+        # later chunk the earlier ones are never paid twice
+        contract_address = contract_address or self.network.disperse_contract
+        if not contract_address:
+            raise ValueError(f"No disperse contract configured for {self.network.name}")
+
+        contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(contract_address), abi=DISPERSE_ABI
+        )
+        chunk_size = max(
+            1, (gas_target - DISPERSE_BASE_GAS) // DISPERSE_GAS_PER_RECIPIENT
+        )
+        journal_amounts = journal_amounts or [amount for _, amount in transfers]
+        results = []
+
+        for i in range(0, len(transfers), chunk_size):
+            chunk = transfers[i : i + chunk_size]
+            amounts = journal_amounts[i : i + chunk_size]
+            logger.info(
+                f"{self.account_name} | {self.address} | Dispersing to recipients {i + 1}-{i + len(chunk)} of {len(transfers)}"
+            )
+
+            try:
+                state, tx_hash = self._disperse_chunk(contract, chunk, amounts)
+            except Exception as e:
+                # Anything raised here happened before the chunk was broadcast
+                logger.error(
+                    f"{self.account_name} | {self.address} | Disperse chunk not sent: {str(e)}"
+                )
+                results.extend(
+                    (address, amount, FAILED, None) for address, amount in chunk
+                )
+                continue
+
+            if state != FAILED:
+                results.extend(
+                    (address, amount, state, tx_hash) for address, amount in chunk
+                )
+                continue
+
+            logger.warning(
+                f"{self.account_name} | {self.address} | Disperse chunk did not go through, falling back to {len(chunk)} single transfers"
+            )
+            for (address, amount), journal_amount in zip(chunk, amounts):
+                tx_hash = self.perform(address, amount, journal_amount=journal_amount)
+                state = self.landed_state(tx_hash) if tx_hash else FAILED
+                if tx_hash and state != BROADCAST:
+                    self._journal_mark(address, journal_amount, state, tx_hash)
+                results.append((address, amount, state, tx_hash))
+
+        return results
+
+    def landed_state(self, tx_hash: str) -> str:
+        # A mined transfer can still have reverted, and one whose receipt cannot
+        # be read is left as broadcast for a resume to check
+        try:
+            receipt = self.get_tx_receipt(tx_hash)
+        except Exception:
+            return BROADCAST
+        return CONFIRMED if receipt["status"] == 1 else FAILED
+
+    def _disperse_chunk(
+        self, contract, chunk: list[tuple[str, int]], journal_amounts: list
+    ) -> tuple[str, str | None]:
+        recipients = [Web3.to_checksum_address(address) for address, _ in chunk]
+        values = [int(amount_wei) for _, amount_wei in chunk]
+
+        tx_params = {
+            "from": self.address,
+            "chainId": self.chain_id,
+            "value": sum(values),
+            "gasPrice": int(self.fee_oracle.gas_price(self.w3) * GAS_PRICE_MULTIPLIER),
+        }
+
+        try:
+            call = contract.functions.disperseEther(recipients, values)
+            tx_params["gas"] = int(call.estimate_gas(tx_params) * GAS_AMT_MULTIPLIER)
+            tx_data = call.build_transaction(tx_params)
+        except Exception as e:
+            logger.warning(
+                f"{self.account_name} | {self.address} | Disperse chunk failed gas estimation: {str(e)}"
+            )
+            return FAILED, None
+
+        tx_data["nonce"] = self.allocate_nonce()
+        signed = self.sign_transaction(tx_dict=tx_data)
+        entries = list(zip(recipients, journal_amounts))
+        self._journal_chunk(entries, SIGNED, signed.hash.hex())
+        try:
+            tx_hash = self.broadcast(signed)
+        except Exception as e:
+            # Single transfers are only safe once the node confirms it never saw
+            # the chunk, a failed lookup leaves it unknown
+            try:
+                seen = self.batch_transport.call(
+                    "eth_getTransactionByHash", [signed.hash.hex()]
+                )
+            except Exception:
+                seen = e
+            if seen is None:
+                self.handle_send_error(e, tx_data["nonce"])
+                self._journal_chunk(entries, FAILED, signed.hash.hex())
+                return FAILED, None
+            logger.warning(
+                f"{self.account_name} | {self.address} | Disperse chunk {signed.hash.hex()} may have been sent, not resending: {str(e)}"
+            )
+            return BROADCAST, signed.hash.hex()
+
+        self._journal_chunk(entries, BROADCAST, tx_hash.hex())
+        broadcast = self.tx_monitor.record(
+            tx_hash.hex(), tx_data, journal_entries=entries
         )
+        try:
+            confirmed = self.confirm_tx(tx_hash, track=False, broadcast=broadcast)
+            receipt = self.get_tx_receipt(confirmed) if confirmed else None
+        except Exception as e:
+            logger.warning(
+                f"{self.account_name} | {self.address} | Disperse chunk {broadcast.tx_hash} was broadcast but its receipt could not be read, not resending: {str(e)}"
+            )
+            return BROADCAST, broadcast.tx_hash
+        if receipt is None:
+            logger.warning(
+                f"{self.account_name} | {self.address} | Disperse chunk {broadcast.tx_hash} still pending after {RECEIPT_TIMEOUT}s, not resending"
+            )
+            return BROADCAST, broadcast.tx_hash
+
+        # Per-recipient fallback only makes sense if the chunk really did not land
+        state = CONFIRMED if receipt["status"] == 1 else FAILED
+        self._journal_chunk(entries, state, confirmed)
+        return state, confirmed
+
+    def _journal_chunk(self, entries: list[tuple[str, Any]], state, tx_hash) -> None:
+        for recipient, journal_amount in entries:
+            self._journal_mark(recipient, journal_amount, state, tx_hash)
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from loguru import logger
+from .transfer import Transfer
+from ..client.nonce_manager import NonceManager
+from ..models.networks import Network
+from ..config.constants import MANY_TO_ONE_WORKERS
+
+
+def prefetch_nonces(client: Transfer, addresses: list[str]) -> None:
+    # One batched eth_getTransactionCount instead of one call per wallet
+    addresses = [address for address in addresses if address]
+    nonces = client.get_nonces(addresses)
+    for address, nonce in zip(addresses, nonces):
+        if nonce is not None:
+            NonceManager.for_account(client.chain_id, address).seed(nonce)
+
+
+def run_wallets(
+    wallets: list[tuple[str | int, str, str | None, str | None]],
+    network: Network,
+    job: Callable[[Transfer], str],
+    workers: int = MANY_TO_ONE_WORKERS,
+) -> list[str]:
+    # Each wallet gets its own Transfer (account, proxy and provider), while fee,
+    # nonce and endpoint state stay shared through the per-network registries
+    def work(wallet: tuple[str | int, str, str | None, str | None]) -> str:
+        account_name, private_key, proxy, address = wallet
+        try:
+            transfer = Transfer(
+                account_name=account_name,
+                private_key=private_key,
+                network=network,
+                proxy=proxy,
+                address=address,
+            )
+            return job(transfer)
+        except Exception as e:
+            logger.error(f"Account {account_name} - Error - {str(e)}")
+            return f"Account {account_name} - Error - {str(e)}"
+
+    logger.info(f"Processing {len(wallets)} wallets with {workers} workers")
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="wallet"
+    ) as executor:
+        return list(executor.map(work, wallets))
@@ -0,0 +1,316 @@
+import asyncio
+from collections import Counter
+from typing import Self
+from loguru import logger
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.middleware import async_geth_poa_middleware
+from web3.types import SignedTx
+from hexbytes import HexBytes
+from eth_typing import HexStr, ChecksumAddress
+from eth_account import Account
+from ..models.networks import Network, Networks
+from .nonce_manager import NonceManager
+from .fee_oracle import FeeOracle
+from .code_cache import CodeCache
+from .endpoint_pool import EndpointPool, construct_async_endpoint_stats_middleware
+from .rate_limiter import construct_async_rate_limit_middleware, get_rate_limiter
+from .provider_cache import provider_cache
+from .retry_policy import FatalError, default_policy
+from .send_policy import SendPolicy
+from ..config.constants import (
+    BALANCE_RETRIES,
+    GAS_AMT_MULTIPLIER,
+    GAS_LIMIT_MULTIPLIER,
+    GAS_PRICE_MULTIPLIER,
+    HTTP_TIMEOUT,
+    RECEIPT_TIMEOUT,
+)
+from ..config.transaction_config import MINIMUM_TRANSFER_REQUIREMENTS
+from ..utils.metrics.metrics import metrics
+
+
+class AsyncEvmClient(SendPolicy):
+
+    def __init__(
+        self: Self,
+        account_name: str | int = None,
+        private_key: HexStr | str = None,
+        network: Network = Networks.Ethereum,
+        user_agent: str = None,
+        proxy: str = None,
+        address: str | ChecksumAddress = None,
+    ) -> Self:
+        self.account_name = account_name if account_name else "unnamed account"
+        self.private_key = private_key
+        self._account = None
+        # A known address (e.g. from the address cache) skips key derivation
+        if address:
+            self.address = Web3.to_checksum_address(address)
+        else:
+            self.address = (
+                Web3.to_checksum_address(self.account.address) if private_key else None
+            )
+        self.network = network
+        self.endpoint_pool = EndpointPool.for_network(self.network)
+        self.rpc = self.endpoint_pool.best() or self.network.rpc_list[0]
+        self.user_agent = (
+            user_agent if user_agent else provider_cache.user_agent_for(proxy)
+        )
+        self.chain_id = self.network.chain_id
+        self.proxy = proxy if proxy else None
+
+        # aiohttp takes a single proxy url instead of the requests-style mapping
+        self.request_kwargs = {
+            "headers": {
+                "User-Agent": self.user_agent,
+                "Content-Type": "application/json",
+            },
+            "proxy": self.proxy,
+            "timeout": aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        }
+
+        self.w3 = self._make_w3(self.rpc)
+
+        self.logger = logger
+        self.module_name = "AsyncEvmClient"
+        self.fee_oracle = FeeOracle.for_network(self.network)
+        self.code_cache = CodeCache.for_network(self.network)
+        self.retry_policy = default_policy
+        self.journal = None
+        self.nonce_manager = (
+            NonceManager.for_account(self.chain_id, self.address)
+            if self.address
+            else None
+        )
+
+    @property
+    def account(self):
+        if self._account is None and self.private_key:
+            self._account = Account.from_key(self.private_key)
+        return self._account
+
+    def _make_w3(self, rpc: str) -> AsyncWeb3:
+        w3 = AsyncWeb3(
+            AsyncHTTPProvider(
+                endpoint_uri=rpc,
+                request_kwargs=self.request_kwargs if self.proxy else None,
+            )
+        )
+        w3.middleware_onion.add(
+            construct_async_endpoint_stats_middleware(self.endpoint_pool, rpc),
+            name="endpoint_stats",
+        )
+        w3.middleware_onion.add(
+            construct_async_rate_limit_middleware(get_rate_limiter(self.network, rpc)),
+            name="rate_limit",
+        )
+
+        if self.network.chain_id in (Networks.Linea.chain_id, Networks.Scroll.chain_id):
+            w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+
+        return w3
+
+    async def get_nonce(self, address: str | ChecksumAddress) -> int:
+        return await self.w3.eth.get_transaction_count(address, "pending")
+
+    async def allocate_nonce(self) -> int:
+        with metrics.stage("nonce"):
+            if self.nonce_manager is None:
+                return await self.get_nonce(self.address)
+            return await self.nonce_manager.allocate_async(
+                lambda: self.get_nonce(self.address)
+            )
+
+    async def estimate_tx_gas(self, tx_params: dict) -> int:
+        # Same rule as the sync client, the cache is shared per network so
+        # recipients classified by a batched pass are not looked up again
+        to_address = tx_params.get("to")
+        if (
+            self.network.transfer_gas is not None
+            and to_address
+            and self.code_cache.lookup(to_address) is None
+        ):
+            try:
+                self.code_cache.remember(
+                    to_address, await self.w3.eth.get_code(to_address)
+                )
+            except Exception as e:
+                logger.warning(f"eth_getCode {to_address} failed: {str(e)}")
+
+        gas = self.code_cache.plain_transfer_gas(tx_params)
+        if gas is not None:
+            return gas
+        with metrics.stage("estimate"):
+            return int(
+                await self.w3.eth.estimate_gas(transaction=tx_params)
+                * GAS_AMT_MULTIPLIER
+            )
+
+    async def get_new_provider(self):
+        await asyncio.sleep(self._switch_provider())
+
+    async def get_tx_params(
+        self,
+        to_address: str | ChecksumAddress = None,
+        value: int = 0,
+        data: bytes = None,
+        default_gas: int = 200000,
+        eip_1559: bool = True,
+        estimate_gas: bool = True,
+        is_for_contract_tx: bool = False,
+        full_balance: bool = False,
+    ) -> dict:
+        balance = await self.get_balance()
+
+        if self.network.name in MINIMUM_TRANSFER_REQUIREMENTS.keys():
+            minimum_requirements = MINIMUM_TRANSFER_REQUIREMENTS.get(self.network.name)
+            min_gas, min_gas_price = minimum_requirements.get(
+                "gas"
+            ), minimum_requirements.get("gasPrice")
+
+            if all([item is not None for item in [min_gas, min_gas_price]]):
+                min_network_fee = int(min_gas * min_gas_price)
+                if balance < min_network_fee:
+                    logger.warning(
+                        f"{self.account_name} | {self.address} - Does not meet the minimum balance requirements of {self.network.name}: {float(Web3.from_wei(min_network_fee, 'ether')):.8f} {self.network.token}"
+                    )
+                    return
+
+        if is_for_contract_tx:
+            return {
+                "from": self.address,
+                "nonce": await self.allocate_nonce(),
+                "chainId": self.chain_id,
+            }
+
+        tx_params = {
+            "from": self.address,
+            "to": Web3.to_checksum_address(to_address),
+            "chainId": self.chain_id,
+            "value": value,
+        }
+
+        if data is not None:
+            tx_params["data"] = data
+
+        with metrics.stage("fee"):
+            if eip_1559 and not full_balance:
+                base_fee_per_gas, max_priority_fee_per_gas = await asyncio.gather(
+                    self.fee_oracle.base_fee_async(self.w3),
+                    self.fee_oracle.priority_fee_async(self.w3),
+                )
+                max_fee_per_gas = max_priority_fee_per_gas + int(
+                    base_fee_per_gas * GAS_LIMIT_MULTIPLIER
+                )
+                tx_params["maxPriorityFeePerGas"] = int(
+                    max_priority_fee_per_gas * GAS_PRICE_MULTIPLIER
+                )
+                tx_params["maxFeePerGas"] = int(max_fee_per_gas * GAS_PRICE_MULTIPLIER)
+            else:
+                # Full balance sweeps need an exact fee, so they always go legacy
+                tx_params["gasPrice"] = int(
+                    await self.fee_oracle.gas_price_async(self.w3)
+                    * GAS_PRICE_MULTIPLIER
+                )
+
+        if estimate_gas:
+            try:
+                tx_params["gas"] = await self.estimate_tx_gas(tx_params)
+            except Exception:
+                tx_params["gas"] = default_gas
+
+        if full_balance and tx_params.get("gas", None) is not None:
+            tx_params["value"] = int(
+                balance - (tx_params["gas"] * tx_params["gasPrice"])
+            )
+
+        tx_params["nonce"] = await self.allocate_nonce()
+
+        return tx_params
+
+    async def get_balance(self) -> int:
+        for _ in range(BALANCE_RETRIES):
+            try:
+                with metrics.stage("balance"):
+                    return int(await self.w3.eth.get_balance(self.address))
+            except Exception as e:
+                logger.warning(f"{self.address} | Error getting balance: {str(e)}")
+                await self.get_new_provider()
+
+        raise Exception(f"Failed to get balance after {BALANCE_RETRIES} attempts")
+
+    async def broadcast(self, signed_tx: SignedTx) -> HexBytes:
+        attempts = Counter()
+        while True:
+            try:
+                with metrics.stage("send"):
+                    return await self.w3.eth.send_raw_transaction(
+                        signed_tx.rawTransaction
+                    )
+            except Exception as e:
+                sent = self._already_sent(e, attempts)
+                # One of the attempts that looked failed may have reached the node
+                if sent or (sent is None and await self._is_known(signed_tx.hash)):
+                    return signed_tx.hash
+
+                delay = self._broadcast_retry_delay(e, attempts)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                await self.get_new_provider()
+
+    async def _is_known(self, tx_hash: HexBytes) -> bool:
+        try:
+            return await self.w3.eth.get_transaction(tx_hash) is not None
+        except Exception:
+            return False
+
+    async def send_tx(self, signed_tx: SignedTx, nonce: int = None) -> str | HexStr:
+        try:
+            tx_hash = await self.broadcast(signed_tx)
+        except Exception as e:
+            self.handle_send_error(e, nonce)
+            return
+
+        return await self.confirm_tx(tx_hash)
+
+    async def confirm_tx(self, tx_hash: HexBytes) -> str | HexStr:
+        try:
+            with metrics.stage("confirm"):
+                res = await self.w3.eth.wait_for_transaction_receipt(
+                    tx_hash, timeout=RECEIPT_TIMEOUT
+                )
+        except Exception as e:
+            # The transaction is out, sending it again would use a new nonce while
+            # this one can still land
+            self.logger.warning(
+                f"{self.account_name} | {self.address} | {self.module_name} | Transaction didn't come through after {RECEIPT_TIMEOUT} seconds."
+            )
+            raise FatalError(
+                f"{tx_hash.hex()} was broadcast but no receipt was read, not resending: {str(e)}"
+            ) from e
+
+        if res["status"] == 1:
+            self.logger.success(
+                f"{self.account_name} | {self.address} | {self.module_name} | Transaction: {self.network.scanner}/tx/{tx_hash.hex()}"
+            )
+        else:
+            self.logger.warning(
+                f"{self.account_name} | {self.address} | {self.module_name} | Transaction failed: {self.network.scanner}/tx/{tx_hash.hex()}"
+            )
+
+        return str(tx_hash.hex())
+
+    def sign_transaction(self, tx_dict: dict) -> SignedTx:
+        if not tx_dict:
+            return None
+
+        with metrics.stage("sign"):
+            return Account.sign_transaction(tx_dict, private_key=self.private_key)
+
+    async def get_gas_price(self):
+        return await self.fee_oracle.gas_price_async(self.w3)
+
+    async def get_tx_receipt(self, tx_hash):
+        return await self.w3.eth.get_transaction_receipt(transaction_hash=tx_hash)
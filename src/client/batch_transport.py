@@ -0,0 +1,225 @@
+import itertools
+import threading
+import time
+from typing import Any, Iterable
+import requests
+from loguru import logger
+from .rate_limiter import TokenBucket, get_rate_limiter
+from .endpoint_pool import EndpointPool
+from .retry_policy import (
+    RATE_LIMITED,
+    TRANSIENT,
+    RetryPolicy,
+    classify_error,
+    default_policy,
+)
+from ..config.constants import HTTP_TIMEOUT, RPC_BATCH_SIZE
+from ..utils.metrics.metrics import RPC_ERRORS, endpoint_label, metrics
+
+
+class RPCError(Exception):
+
+    def __init__(self, method: str, error: dict | str):
+        self.method = method
+        self.code = error.get("code") if isinstance(error, dict) else None
+        self.message = (
+            error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        )
+        super().__init__(f"{method}: {self.message}")
+
+
+class BatchRejected(Exception):
+    pass
+
+
+BATCH_SIZE_ERRORS = (
+    "batch too large",
+    "batch size",
+    "batch limit",
+    "max batch",
+    "too many requests in batch",
+    "payload too large",
+    "request entity too large",
+)
+
+
+def is_batch_size_error(error: dict | str) -> bool:
+    message = error.get("message", "") if isinstance(error, dict) else error
+    return any(pattern in str(message).lower() for pattern in BATCH_SIZE_ERRORS)
+
+
+class BatchTransport:
+
+    def __init__(
+        self,
+        rpc: str,
+        request_kwargs: dict | None = None,
+        max_batch_size: int = RPC_BATCH_SIZE,
+        rate_limiter: TokenBucket | None = None,
+        session: requests.Session | None = None,
+        endpoint_pool: EndpointPool | None = None,
+        retry_policy: RetryPolicy = default_policy,
+    ):
+        self.rpc = rpc
+        self.request_kwargs = request_kwargs or {"timeout": HTTP_TIMEOUT}
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.rate_limiter = rate_limiter
+        self.session = session or requests.Session()
+        self.endpoint_pool = endpoint_pool
+        self.retry_policy = retry_policy
+        self._ids = itertools.count()
+        self._ids_lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            return next(self._ids)
+
+    def call(self, method: str, params: list) -> Any:
+        result = self.call_many([(method, params)])[0]
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+    def call_many(self, calls: Iterable[tuple[str, list]]) -> list:
+        # Results come back in call order, failed calls as RPCError instances
+        calls = list(calls)
+        results = []
+        for i in range(0, len(calls), self.max_batch_size):
+            results.extend(self._send_chunk(calls[i : i + self.max_batch_size]))
+        return results
+
+    def _send_chunk(self, calls: list[tuple[str, list]]) -> list:
+        return self._send_split(calls)[0]
+
+    def _send_split(self, calls: list[tuple[str, list]]) -> tuple[list, bool]:
+        try:
+            return self._post_retrying(calls), False
+        except BatchRejected as e:
+            if len(calls) == 1:
+                return [RPCError(calls[0][0], str(e))], True
+
+            # Provider refused the batch over its size limit, so split this chunk
+            # in half. The smaller size is only kept once a batch that small went
+            # through, a provider refusing even single calls says nothing about size
+            middle = len(calls) // 2
+            logger.warning(
+                f"Batch of {len(calls)} rejected by {self.rpc}, splitting: {str(e)}"
+            )
+            first, rejected = self._send_split(calls[:middle])
+            if not rejected:
+                self.max_batch_size = max(min(self.max_batch_size, middle), 1)
+            second, _ = self._send_split(calls[middle:])
+            return first + second, rejected
+
+    def _post_retrying(self, calls: list[tuple[str, list]]) -> list:
+        # Reads and already signed raw transactions are safe to send twice, so a
+        # chunk the endpoint failed as a whole goes to the next best endpoint
+        # instead of failing every call in it
+        rpc = self.rpc
+        attempt = 0
+        while True:
+            try:
+                return self._post(calls, rpc)
+            except BatchRejected:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in (TRANSIENT, RATE_LIMITED) or not (
+                    self.retry_policy.should_retry(kind, attempt)
+                ):
+                    raise
+                delay = self.retry_policy.delay(kind, attempt)
+                attempt += 1
+                logger.warning(
+                    f"Batch of {len(calls)} failed on {rpc}, retry {attempt} in {delay:.1f}s: {str(e)}"
+                )
+                time.sleep(delay)
+                rpc = self._next_rpc(rpc)
+
+    def _next_rpc(self, failed: str) -> str:
+        if self.endpoint_pool is None:
+            return failed
+        return self.endpoint_pool.best(exclude={failed}) or failed
+
+    def _rate_limiter(self, rpc: str) -> TokenBucket | None:
+        if rpc == self.rpc or self.endpoint_pool is None:
+            return self.rate_limiter
+        return get_rate_limiter(self.endpoint_pool.network, rpc)
+
+    def _post(self, calls: list[tuple[str, list]], rpc: str | None = None) -> list:
+        rpc = rpc or self.rpc
+        ids = [self._next_id() for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+
+        rate_limiter = self._rate_limiter(rpc)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        # A batch is timed as one call, labelled by its method when it has only one
+        methods = {method for method, _ in calls}
+        label = methods.pop() if len(methods) == 1 else "batch"
+
+        started_at = time.monotonic()
+        try:
+            response = self.session.post(rpc, json=payload, **self.request_kwargs)
+            if response.status_code == 429:
+                response.raise_for_status()
+        except Exception as e:
+            self._record(rpc, label, time.monotonic() - started_at, e)
+            raise
+        latency = time.monotonic() - started_at
+
+        if response.status_code in (400, 413):
+            self._record(rpc, label, latency)
+            raise BatchRejected(f"HTTP {response.status_code}")
+        try:
+            response.raise_for_status()
+            replies = response.json()
+        except Exception as e:
+            self._record(rpc, label, latency, e)
+            raise
+
+        if isinstance(replies, dict):
+            error = replies.get("error", replies)
+            if is_batch_size_error(error):
+                self._record(rpc, label, latency)
+                raise BatchRejected(str(error))
+            # Anything else answered for the whole batch, a rate limit included,
+            # is the endpoint failing and not a reason to send smaller batches
+            error = RPCError(label, error)
+            self._record(rpc, label, latency, error)
+            raise error
+        self._record(rpc, label, latency)
+
+        by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+        results = []
+        for request_id, (method, _) in zip(ids, calls):
+            reply = by_id.get(request_id)
+            if reply is None:
+                results.append(RPCError(method, "missing from batch response"))
+            elif "error" in reply:
+                results.append(RPCError(method, reply["error"]))
+                metrics.inc(
+                    RPC_ERRORS,
+                    method=method,
+                    endpoint=endpoint_label(rpc),
+                    error="rpc_error",
+                )
+            else:
+                results.append(reply.get("result"))
+        return results
+
+    def _record(
+        self, rpc: str, label: str, latency: float, error: Exception | None = None
+    ) -> None:
+        if error is None:
+            if self.endpoint_pool is not None:
+                self.endpoint_pool.record_success(rpc, latency)
+            metrics.observe_rpc(label, rpc, latency)
+            return
+        if self.endpoint_pool is not None:
+            self.endpoint_pool.record_error(rpc, error, latency)
+        metrics.observe_rpc(label, rpc, latency, type(error).__name__)
@@ -0,0 +1,73 @@
+import threading
+from typing import Any, Callable
+from web3 import Web3
+from ..models.networks import Network
+
+EMPTY_CODE = ("0x", "0x0", "")
+EMPTY_DATA = (None, "0x", "", b"")
+
+
+def has_code(code: Any) -> bool:
+    if isinstance(code, (bytes, bytearray)):
+        return len(code) > 0
+    return code not in EMPTY_CODE
+
+
+class CodeCache:
+    # Remembers per network which recipients are contracts, so plain transfers
+    # to EOAs can use the fixed intrinsic gas instead of an estimate
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, network: Network):
+        self.network = network
+        self._contracts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_network(cls, network: Network) -> "CodeCache":
+        with cls._registry_lock:
+            cache = cls._registry.get(network.chain_id)
+            if cache is None:
+                cache = cls(network)
+                cls._registry[network.chain_id] = cache
+            return cache
+
+    def lookup(self, address: str) -> bool | None:
+        return self._contracts.get(Web3.to_checksum_address(address))
+
+    def remember(self, address: str, code: Any) -> bool:
+        is_contract = has_code(code)
+        with self._lock:
+            self._contracts[Web3.to_checksum_address(address)] = is_contract
+        return is_contract
+
+    def classify(
+        self,
+        addresses: list[str],
+        read_codes: Callable[[list[str]], list[str | None]],
+    ) -> dict[str, bool | None]:
+        # Unknown addresses are looked up in one batched eth_getCode read, failed
+        # lookups stay unknown and are treated like contracts by callers
+        addresses = [Web3.to_checksum_address(address) for address in addresses]
+        unknown = [
+            address
+            for address in dict.fromkeys(addresses)
+            if address not in self._contracts
+        ]
+        if unknown:
+            for address, code in zip(unknown, read_codes(unknown)):
+                if code is not None:
+                    self.remember(address, code)
+        return {address: self._contracts.get(address) for address in addresses}
+
+    def plain_transfer_gas(self, tx_params: dict) -> int | None:
+        # Only a value transfer with no calldata to a known EOA has a fixed cost
+        if self.network.transfer_gas is None:
+            return None
+        if tx_params.get("data") not in EMPTY_DATA or not tx_params.get("to"):
+            return None
+        if self.lookup(tx_params["to"]) is not False:
+            return None
+        return self.network.transfer_gas
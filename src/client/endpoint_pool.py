@@ -0,0 +1,242 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+from loguru import logger
+from ..models.networks import Network
+from ..utils.metrics.metrics import metrics
+from ..config.constants import (
+    ENDPOINT_BREAKER_MAX_COOLDOWN,
+    ENDPOINT_BREAKER_THRESHOLD,
+    ENDPOINT_COOLDOWN,
+    ENDPOINT_EWMA_ALPHA,
+    ENDPOINT_RATE_LIMIT_COOLDOWN,
+    HEDGE_LATENCY_BUDGET,
+)
+
+T = TypeVar("T")
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+def is_rate_limit_error(error: Exception | str) -> bool:
+    message = str(error).lower()
+    return "429" in message or "too many requests" in message or "rate limit" in message
+
+
+@dataclass
+class EndpointStats:
+    latency: float | None = None
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    unavailable_until: float = 0.0
+    consecutive_failures: int = 0
+    breaker_trips: int = 0
+
+
+class EndpointPool:
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, network: Network):
+        self.network = network
+        # rpc_list repeats urls for some networks, a pool only needs each once
+        self.endpoints = list(dict.fromkeys(network.rpc_list))
+        self.stats = {rpc: EndpointStats() for rpc in self.endpoints}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_network(cls, network: Network) -> "EndpointPool":
+        with cls._registry_lock:
+            pool = cls._registry.get(network.chain_id)
+            if pool is None:
+                pool = cls(network)
+                cls._registry[network.chain_id] = pool
+            return pool
+
+    def _stats(self, rpc: str) -> EndpointStats:
+        stats = self.stats.get(rpc)
+        if stats is None:
+            stats = self.stats[rpc] = EndpointStats()
+        return stats
+
+    def record_success(self, rpc: str, latency: float) -> None:
+        with self._lock:
+            stats = self._stats(rpc)
+            stats.calls += 1
+            stats.latency = (
+                latency
+                if stats.latency is None
+                else ENDPOINT_EWMA_ALPHA * latency
+                + (1 - ENDPOINT_EWMA_ALPHA) * stats.latency
+            )
+            stats.error_rate *= 1 - ENDPOINT_EWMA_ALPHA
+            stats.consecutive_failures = 0
+            stats.breaker_trips = 0
+
+    def record_error(
+        self, rpc: str, error: Exception | str, latency: float | None = None
+    ) -> None:
+        with self._lock:
+            stats = self._stats(rpc)
+            stats.calls += 1
+            stats.errors += 1
+            stats.error_rate = ENDPOINT_EWMA_ALPHA + (1 - ENDPOINT_EWMA_ALPHA) * (
+                stats.error_rate
+            )
+            if latency is not None and stats.latency is not None:
+                stats.latency = max(stats.latency, latency)
+
+            if is_rate_limit_error(error):
+                stats.rate_limited += 1
+                stats.unavailable_until = (
+                    time.monotonic() + ENDPOINT_RATE_LIMIT_COOLDOWN
+                )
+                return
+
+            # Circuit breaker: open after a run of failures, and once the cooldown
+            # is over a single failed trial call opens it again for twice as long.
+            # Calls still in flight while it is open do not extend it
+            stats.consecutive_failures += 1
+            if (
+                stats.consecutive_failures >= ENDPOINT_BREAKER_THRESHOLD
+                and stats.unavailable_until <= time.monotonic()
+            ):
+                cooldown = min(
+                    ENDPOINT_COOLDOWN * 2**stats.breaker_trips,
+                    ENDPOINT_BREAKER_MAX_COOLDOWN,
+                )
+                stats.breaker_trips += 1
+                stats.unavailable_until = time.monotonic() + cooldown
+                logger.warning(
+                    f"{self.network.name} | Circuit open for {rpc} for {cooldown}s after {stats.consecutive_failures} failures in a row"
+                )
+
+    def score(self, rpc: str) -> float:
+        stats = self._stats(rpc)
+        # Endpoints without samples score best so every url gets tried once
+        latency = stats.latency if stats.latency is not None else 0.0
+        return latency * (1 + 10 * stats.error_rate) + stats.error_rate
+
+    def ranked(self, exclude: set | tuple = ()) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [rpc for rpc in self.endpoints if rpc not in exclude]
+            healthy = [
+                rpc for rpc in candidates if self.stats[rpc].unavailable_until <= now
+            ]
+            cooling = [rpc for rpc in candidates if rpc not in healthy]
+            return sorted(healthy, key=self.score) + sorted(
+                cooling, key=lambda rpc: self.stats[rpc].unavailable_until
+            )
+
+    def best(self, exclude: set | tuple = ()) -> str | None:
+        ranked = self.ranked(exclude)
+        return ranked[0] if ranked else None
+
+    def wait_time(self, rpc: str) -> float:
+        with self._lock:
+            return max(0.0, self._stats(rpc).unavailable_until - time.monotonic())
+
+    def hedged(
+        self,
+        call: Callable[[str], T],
+        primary: str | None = None,
+        budget: float = HEDGE_LATENCY_BUDGET,
+    ) -> T:
+        # Reads only: the same call goes to a second endpoint when the first one
+        # misses the latency budget or fails, whichever answer lands first wins
+        ranked = self.ranked()
+        if primary is not None and primary in ranked:
+            ranked.remove(primary)
+            ranked.insert(0, primary)
+        if not ranked:
+            raise Exception(f"No rpc endpoints configured for {self.network.name}")
+
+        futures = {_hedge_executor.submit(call, ranked[0]): ranked[0]}
+        backups = iter(ranked[1:])
+        last_error = None
+
+        while futures:
+            done, _ = wait(futures, timeout=budget, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                rpc = futures.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.debug(f"Hedged read on {rpc} failed: {str(e)}")
+
+            backup = next(backups, None)
+            if backup is not None:
+                if not done:
+                    logger.debug(
+                        f"{futures[next(iter(futures))]} missed {budget}s budget, hedging to {backup}"
+                    )
+                futures[_hedge_executor.submit(call, backup)] = backup
+
+        raise last_error
+
+
+def construct_endpoint_stats_middleware(pool: EndpointPool, rpc: str):
+    def endpoint_stats_middleware(make_request, w3):
+        def middleware(method, params):
+            started_at = time.monotonic()
+            try:
+                response = make_request(method, params)
+            except Exception as e:
+                latency = time.monotonic() - started_at
+                pool.record_error(rpc, e, latency)
+                metrics.observe_rpc(method, rpc, latency, type(e).__name__)
+                raise
+            latency = time.monotonic() - started_at
+
+            # Reverts and bad params are answers too, only throttling counts
+            # against the endpoint
+            if "error" in response and is_rate_limit_error(response["error"]):
+                pool.record_error(rpc, response["error"], latency)
+                metrics.observe_rpc(method, rpc, latency, "rate_limited")
+            else:
+                pool.record_success(rpc, latency)
+                metrics.observe_rpc(
+                    method, rpc, latency, "rpc_error" if "error" in response else None
+                )
+            return response
+
+        return middleware
+
+    return endpoint_stats_middleware
+
+
+def construct_async_endpoint_stats_middleware(pool: EndpointPool, rpc: str):
+    async def endpoint_stats_middleware(make_request, w3):
+        async def middleware(method, params):
+            started_at = time.monotonic()
+            try:
+                response = await make_request(method, params)
+            except Exception as e:
+                latency = time.monotonic() - started_at
+                pool.record_error(rpc, e, latency)
+                metrics.observe_rpc(method, rpc, latency, type(e).__name__)
+                raise
+            latency = time.monotonic() - started_at
+
+            # Reverts and bad params are answers too, only throttling counts
+            # against the endpoint
+            if "error" in response and is_rate_limit_error(response["error"]):
+                pool.record_error(rpc, response["error"], latency)
+                metrics.observe_rpc(method, rpc, latency, "rate_limited")
+            else:
+                pool.record_success(rpc, latency)
+                metrics.observe_rpc(
+                    method, rpc, latency, "rpc_error" if "error" in response else None
+                )
+            return response
+
+        return middleware
+
+    return endpoint_stats_middleware
@@ -1,24 +1,46 @@
 from web3 import Web3
-import random
 import time
+from collections import Counter
+from web3.exceptions import TimeExhausted
 from web3.middleware.geth_poa import geth_poa_middleware
-from typing import Self
+from typing import Any, Callable, Self
 from loguru import logger
 from web3.types import SignedTx
+from hexbytes import HexBytes
 from eth_typing import HexStr, ChecksumAddress
 from eth_account import Account
 from ..models.networks import Network, Networks
+from .nonce_manager import NonceManager
+from .fee_oracle import FeeOracle
+from .code_cache import CodeCache
+from .tx_monitor import PendingBroadcast, TxMonitor
+from .rate_limiter import construct_rate_limit_middleware, get_rate_limiter
+from .batch_transport import BatchTransport, RPCError
+from .signing_pool import sign_transactions
+from .endpoint_pool import EndpointPool, construct_endpoint_stats_middleware
+from .provider_cache import PooledHTTPProvider, provider_cache
+from .send_policy import SendPolicy
+from .retry_policy import (
+    RATE_LIMITED,
+    TRANSIENT,
+    classify_error,
+    default_policy,
+)
+from ..utils.metrics.metrics import metrics
 from ..config.constants import (
     GAS_AMT_MULTIPLIER,
     GAS_LIMIT_MULTIPLIER,
+    BALANCE_RETRIES,
     GAS_PRICE_MULTIPLIER,
+    HEDGE_READS,
+    RECEIPT_TIMEOUT,
 )
 from ..config.transaction_config import MINIMUM_TRANSFER_REQUIREMENTS
 
-import pyuseragents
+import requests
 
 
-class EvmClient:
+class EvmClient(SendPolicy):
 
     def __init__(
         self: Self,
@@ -27,16 +49,24 @@ class EvmClient:
         network: Network = Networks.Ethereum,
         user_agent: str = None,
         proxy: str = None,
+        address: str | ChecksumAddress = None,
     ) -> Self:
         self.account_name = account_name if account_name else "unnamed account"
         self.private_key = private_key
-        self.account = Account.from_key(self.private_key) if private_key else None
-        self.address = (
-            Web3.to_checksum_address(self.account.address) if private_key else None
-        )
+        self._account = None
+        # A known address (e.g. from the address cache) skips key derivation
+        if address:
+            self.address = Web3.to_checksum_address(address)
+        else:
+            self.address = (
+                Web3.to_checksum_address(self.account.address) if private_key else None
+            )
         self.network = network
-        self.rpc = self.network.rpc_list[0]
-        self.user_agent = user_agent if user_agent else pyuseragents.random()
+        self.endpoint_pool = EndpointPool.for_network(self.network)
+        self.rpc = self.endpoint_pool.best() or self.network.rpc_list[0]
+        self.user_agent = (
+            user_agent if user_agent else provider_cache.user_agent_for(proxy)
+        )
         self.chain_id = self.network.chain_id
         self.proxy = proxy if proxy else None
 
@@ -52,41 +82,168 @@ class EvmClient:
             "timeout": 60,
         }
 
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                endpoint_uri=self.rpc,
-                request_kwargs=self.request_kwargs if proxy and user_agent else None,
-            )
-        )
+        self.w3 = self._make_w3(self.rpc)
 
         self.logger = logger
         self.module_name = "EvmClient"
+        self.receipt_tracker = None
+        self.journal = None
+        self._batch_transport = None
+        self.fee_oracle = FeeOracle.for_network(self.network)
+        self.code_cache = CodeCache.for_network(self.network)
+        self.retry_policy = default_policy
+        self.tx_monitor = TxMonitor(self)
+        self.nonce_manager = (
+            NonceManager.for_account(self.chain_id, self.address)
+            if self.address
+            else None
+        )
 
-        if network.chain_id in (Networks.Linea.chain_id, Networks.Scroll.chain_id):
-            self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    @property
+    def account(self):
+        if self._account is None and self.private_key:
+            self._account = Account.from_key(self.private_key)
+        return self._account
+
+    def _provider_key(self, rpc: str) -> tuple:
+        return (self.chain_id, rpc, self.proxy, self.user_agent)
+
+    def _build_w3(self, rpc: str, session: requests.Session) -> Web3:
+        w3 = Web3(
+            PooledHTTPProvider(
+                endpoint_uri=rpc,
+                request_kwargs=(
+                    self.request_kwargs if self.proxy and self.user_agent else None
+                ),
+                session=session,
+            )
+        )
+        w3.middleware_onion.add(
+            construct_endpoint_stats_middleware(self.endpoint_pool, rpc),
+            name="endpoint_stats",
+        )
+        w3.middleware_onion.add(
+            construct_rate_limit_middleware(get_rate_limiter(self.network, rpc)),
+            name="rate_limit",
+        )
+
+        if self.network.chain_id in (Networks.Linea.chain_id, Networks.Scroll.chain_id):
+            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+
+        return w3
+
+    def _make_w3(self, rpc: str) -> Web3:
+        w3, _ = provider_cache.get(
+            self._provider_key(rpc), lambda session: self._build_w3(rpc, session)
+        )
+        return w3
+
+    def read(self, call: Callable[[Web3], Any]) -> Any:
+        if not HEDGE_READS:
+            return call(self.w3)
+        return self.endpoint_pool.hedged(
+            lambda rpc: call(self._make_w3(rpc)), primary=self.rpc
+        )
+
+    @property
+    def batch_transport(self) -> BatchTransport:
+        if self._batch_transport is None or self._batch_transport.rpc != self.rpc:
+            _, session = provider_cache.get(
+                self._provider_key(self.rpc),
+                lambda session: self._build_w3(self.rpc, session),
+            )
+            self._batch_transport = BatchTransport(
+                rpc=self.rpc,
+                request_kwargs=(
+                    self.request_kwargs if self.proxy and self.user_agent else None
+                ),
+                rate_limiter=get_rate_limiter(self.network, self.rpc),
+                endpoint_pool=self.endpoint_pool,
+                session=session,
+            )
+        return self._batch_transport
+
+    def _batch_read(self, method: str, params_list: list[list]) -> list:
+        results = self.batch_transport.call_many(
+            (method, params) for params in params_list
+        )
+        for params, result in zip(params_list, results):
+            if isinstance(result, RPCError):
+                logger.warning(f"{method} {params[0]} failed: {result.message}")
+        return [None if isinstance(result, RPCError) else result for result in results]
+
+    def get_balances(
+        self, addresses: list[str | ChecksumAddress], block: str = "latest"
+    ) -> list[int | None]:
+        results = self._batch_read(
+            "eth_getBalance", [[address, block] for address in addresses]
+        )
+        return [int(result, 16) if result is not None else None for result in results]
+
+    def get_nonces(
+        self, addresses: list[str | ChecksumAddress], block: str = "pending"
+    ) -> list[int | None]:
+        results = self._batch_read(
+            "eth_getTransactionCount", [[address, block] for address in addresses]
+        )
+        return [int(result, 16) if result is not None else None for result in results]
+
+    def get_codes(
+        self, addresses: list[str | ChecksumAddress], block: str = "latest"
+    ) -> list[str | None]:
+        return self._batch_read(
+            "eth_getCode", [[address, block] for address in addresses]
+        )
+
+    def classify_recipients(
+        self, addresses: list[str | ChecksumAddress]
+    ) -> dict[str, bool | None]:
+        if self.network.transfer_gas is None:
+            return {}
+        # Recipients left unclassified fall back to gas estimation, so a failed
+        # lookup only costs the shortcut
+        try:
+            return self.code_cache.classify(addresses, self.get_codes)
+        except Exception as e:
+            logger.warning(
+                f"Code lookup for {len(addresses)} recipients failed: {str(e)}"
+            )
+            return {}
+
+    def estimate_tx_gas(self, tx_params: dict) -> int:
+        # Plain transfers to a known EOA always cost the intrinsic gas, anything
+        # else, including recipients that could not be classified, is estimated
+        if tx_params.get("to"):
+            self.classify_recipients([tx_params["to"]])
+        gas = self.code_cache.plain_transfer_gas(tx_params)
+        if gas is not None:
+            return gas
+        with metrics.stage("estimate"):
+            return int(
+                self.w3.eth.estimate_gas(transaction=tx_params) * GAS_AMT_MULTIPLIER
+            )
+
+    def get_tx_receipts(self, tx_hashes: list[str]) -> list[dict | None]:
+        return self._batch_read(
+            "eth_getTransactionReceipt", [[tx_hash] for tx_hash in tx_hashes]
+        )
+
+    def get_transactions(self, tx_hashes: list[str]) -> list[dict | None]:
+        return self._batch_read(
+            "eth_getTransactionByHash", [[tx_hash] for tx_hash in tx_hashes]
+        )
 
     def get_nonce(self, address: str | ChecksumAddress) -> int:
-        return self.w3.eth.get_transaction_count(address)
+        return self.read(lambda w3: w3.eth.get_transaction_count(address, "pending"))
+
+    def allocate_nonce(self) -> int:
+        with metrics.stage("nonce"):
+            if self.nonce_manager is None:
+                return self.get_nonce(self.address)
+            return self.nonce_manager.allocate(lambda: self.get_nonce(self.address))
 
     def get_new_provider(self):
-        unused_rpcs = []
-        for rpc in self.network.rpc_list:
-            if rpc != self.rpc:
-                unused_rpcs.append(rpc)
-
-        if len(unused_rpcs) > 0:
-            self.rpc = random.choice(unused_rpcs)
-            self.w3 = self.w3 = Web3(
-                Web3.HTTPProvider(
-                    endpoint_uri=self.rpc,
-                    request_kwargs=(
-                        self.request_kwargs if self.proxy and self.user_agent else None
-                    ),
-                )
-            )
-        else:
-            logger.warning(f"RPC error on {self.rpc} and no replacement rpc")
-            time.sleep(60)
+        time.sleep(self._switch_provider())
 
     def get_tx_params(
         self,
@@ -118,7 +275,7 @@ class EvmClient:
         if is_for_contract_tx:
             return {
                 "from": Web3.to_checksum_address(self.address),
-                "nonce": self.get_nonce(self.address),
+                "nonce": self.allocate_nonce(),
                 "chainId": self.chain_id,
             }
 
@@ -126,36 +283,31 @@ class EvmClient:
             "from": Web3.to_checksum_address(self.address),
             "to": Web3.to_checksum_address(to_address),
             "chainId": self.chain_id,
-            "nonce": self.get_nonce(self.address),
             "value": value,
         }
 
-        time.sleep(4)
-
         if data is not None:
             tx_params["data"] = data
 
-        if eip_1559:
-            time.sleep(5)
-            base_fee_per_gas = self.w3.eth.get_block("latest")["baseFeePerGas"]
-            max_priority_fee_per_gas = self.w3.eth.max_priority_fee
-            max_fee_per_gas = max_priority_fee_per_gas + int(
-                base_fee_per_gas * GAS_LIMIT_MULTIPLIER
-            )
-            tx_params["maxPriorityFeePerGas"] = int(
-                max_priority_fee_per_gas * GAS_PRICE_MULTIPLIER
-            )
-            tx_params["maxFeePerGas"] = int(max_fee_per_gas * GAS_PRICE_MULTIPLIER)
-        else:
-            tx_params["gasPrice"] = int(self.w3.eth.gas_price * GAS_PRICE_MULTIPLIER)
-            time.sleep(4)
+        with metrics.stage("fee"):
+            if eip_1559:
+                base_fee_per_gas = self.fee_oracle.base_fee(self.w3)
+                max_priority_fee_per_gas = self.fee_oracle.priority_fee(self.w3)
+                max_fee_per_gas = max_priority_fee_per_gas + int(
+                    base_fee_per_gas * GAS_LIMIT_MULTIPLIER
+                )
+                tx_params["maxPriorityFeePerGas"] = int(
+                    max_priority_fee_per_gas * GAS_PRICE_MULTIPLIER
+                )
+                tx_params["maxFeePerGas"] = int(max_fee_per_gas * GAS_PRICE_MULTIPLIER)
+            else:
+                tx_params["gasPrice"] = int(
+                    self.fee_oracle.gas_price(self.w3) * GAS_PRICE_MULTIPLIER
+                )
 
         if estimate_gas:
             try:
-                tx_params["gas"] = int(
-                    self.w3.eth.estimate_gas(transaction=tx_params) * GAS_AMT_MULTIPLIER
-                )
-                time.sleep(4)
+                tx_params["gas"] = self.estimate_tx_gas(tx_params)
             except Exception:
                 tx_params["gas"] = default_gas
 
@@ -166,52 +318,138 @@ class EvmClient:
                     del tx_params["maxFeePerGas"]
                     del tx_params["maxPriorityFeePerGas"]
                     tx_params["gasPrice"] = int(
-                        self.w3.eth.gas_price * GAS_PRICE_MULTIPLIER
-                    )
-                    tx_params["gas"] = int(
-                        self.w3.eth.estimate_gas(transaction=tx_params)
-                        * GAS_AMT_MULTIPLIER
+                        self.fee_oracle.gas_price(self.w3) * GAS_PRICE_MULTIPLIER
                     )
+                    tx_params["gas"] = self.estimate_tx_gas(tx_params)
 
                 tx_params["value"] = int(
                     balance - (tx_params["gas"] * tx_params["gasPrice"])
                 )
 
+        tx_params["nonce"] = self.allocate_nonce()
+
         return tx_params
 
     def get_balance(self):
+        for _ in range(BALANCE_RETRIES):
+            try:
+                with metrics.stage("balance"):
+                    return int(self.read(lambda w3: w3.eth.get_balance(self.address)))
+            except Exception as e:
+                logger.warning(f"{self.address} | Error getting balance: {str(e)}")
+                self.get_new_provider()
+
+        raise Exception(f"Failed to get balance after {BALANCE_RETRIES} attempts")
+
+    def broadcast(self, signed_tx: SignedTx) -> HexBytes:
+        attempts = Counter()
+        while True:
+            try:
+                with metrics.stage("send"):
+                    return self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            except Exception as e:
+                sent = self._already_sent(e, attempts)
+                # One of the attempts that looked failed may have reached the node
+                if sent or (sent is None and self._is_known(signed_tx.hash)):
+                    return signed_tx.hash
+
+                delay = self._broadcast_retry_delay(e, attempts)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                self.get_new_provider()
+
+    def _is_known(self, tx_hash: HexBytes) -> bool:
         try:
-            return int(self.w3.eth.get_balance(self.address))
-        except Exception as e:
-            logger.warning(f"{self.address} | Error getting balance: {str(e)}")
-            self.get_new_provider()
-            time.sleep(5)
-            return self.get_balance()
+            return self.read(lambda w3: w3.eth.get_transaction(tx_hash)) is not None
+        except Exception:
+            return False
 
-    def send_tx(self, signed_tx: SignedTx) -> str | HexStr:
-        timeout = 180
+    def send_tx(
+        self,
+        signed_tx: SignedTx,
+        nonce: int = None,
+        tx_context: Any = None,
+        track: bool = True,
+        tx_data: dict | None = None,
+    ) -> str | HexStr:
         try:
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        except ValueError:
+            tx_hash = self.broadcast(signed_tx)
+        except Exception as e:
+            self.handle_send_error(e, nonce)
             return
 
-        if tx_hash:
+        # Only a send whose parameters are known can be replaced if it gets stuck
+        broadcast = self.tx_monitor.record(tx_hash.hex(), tx_data) if tx_data else None
+        return self.confirm_tx(
+            tx_hash, tx_context=tx_context, track=track, broadcast=broadcast
+        )
 
-            res = self.w3.eth.wait_for_transaction_receipt(
-                tx_hash.hex(), timeout=timeout
+    def confirm_tx(
+        self,
+        tx_hash: HexBytes,
+        tx_context: Any = None,
+        track: bool = True,
+        broadcast: PendingBroadcast | None = None,
+    ) -> str | HexStr:
+        timeout = RECEIPT_TIMEOUT
+
+        if track and self.receipt_tracker is not None:
+            self.receipt_tracker.track(
+                tx_hash.hex(),
+                context=(
+                    tx_context
+                    if tx_context is not None
+                    else {"account_name": self.account_name, "address": self.address}
+                ),
+                broadcast=broadcast,
             )
-
-            if res:
-                if res["status"] == 1:
-                    self.logger.success(
-                        f"{self.account_name} | {self.address} | {self.module_name} | Transaction: {self.network.scanner}/tx/{tx_hash.hex()}"
-                    )
-                elif res["status"] == 0:
-                    self.logger.warning(
-                        f"{self.account_name} | {self.address} | {self.module_name} | Transaction failed: {self.network.scanner}/tx/{tx_hash.hex()}"
+            self.logger.info(
+                f"{self.account_name} | {self.address} | {self.module_name} | Broadcast: {self.network.scanner}/tx/{tx_hash.hex()}"
+            )
+            return str(tx_hash.hex())
+
+        res = None
+        deadline = time.monotonic() + timeout
+        attempts = Counter()
+        with metrics.stage("confirm"):
+            if broadcast is not None and self.tx_monitor.enabled:
+                landed = self.tx_monitor.wait(broadcast, timeout)
+                if landed is not None:
+                    tx_hash, res = HexBytes(landed[0]), landed[1]
+                    res = dict(res, status=int(res["status"], 16))
+            while res is None and time.monotonic() < deadline:
+                try:
+                    res = self.w3.eth.wait_for_transaction_receipt(
+                        tx_hash.hex(), timeout=max(deadline - time.monotonic(), 1)
                     )
+                    break
+                except TimeExhausted:
+                    break
+                except Exception as e:
+                    # A failed receipt poll says nothing about the transaction,
+                    # so only the polling is retried
+                    kind = classify_error(e)
+                    if kind not in (TRANSIENT, RATE_LIMITED) or not (
+                        self.retry_policy.should_retry(kind, attempts[kind])
+                    ):
+                        raise
+                    delay = self.retry_policy.delay(kind, attempts[kind])
+                    attempts[kind] += 1
+                    metrics.count_retry("confirm_tx", e)
+                    time.sleep(delay)
+
+        if res:
+            if res["status"] == 1:
+                self.logger.success(
+                    f"{self.account_name} | {self.address} | {self.module_name} | Transaction: {self.network.scanner}/tx/{tx_hash.hex()}"
+                )
+            elif res["status"] == 0:
+                self.logger.warning(
+                    f"{self.account_name} | {self.address} | {self.module_name} | Transaction failed: {self.network.scanner}/tx/{tx_hash.hex()}"
+                )
 
-                return str(tx_hash.hex())
+            return str(tx_hash.hex())
 
         self.logger.warning(
             f"{self.account_name} | {self.address} | {self.module_name} | Transaction didn't come through after {timeout} seconds."
@@ -220,17 +458,19 @@ class EvmClient:
         return
 
     def sign_transaction(self, tx_dict: dict) -> SignedTx:
+        if not tx_dict:
+            return None
 
-        return (
-            self.w3.eth.account.sign_transaction(
+        with metrics.stage("sign"):
+            return self.w3.eth.account.sign_transaction(
                 transaction_dict=tx_dict, private_key=self.private_key
             )
-            if tx_dict
-            else None
-        )
+
+    def sign_transactions(self, tx_dicts: list[dict]) -> list[HexBytes]:
+        return sign_transactions(tx_dicts, self.private_key)
 
     def get_gas_price(self):
-        return self.w3.eth.gas_price
+        return self.fee_oracle.gas_price(self.w3)
 
     def get_tx_receipt(self, tx_hash):
         return self.w3.eth.get_transaction_receipt(transaction_hash=tx_hash)
@@ -0,0 +1,128 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from loguru import logger
+from web3 import AsyncWeb3, Web3
+from ..models.networks import Network
+from ..config.constants import FEE_CACHE_TTL
+
+
+@dataclass
+class FeeQuote:
+    value: int
+    fetched_at: float
+    block_number: int | None = None
+
+
+class FeeOracle:
+    GAS_PRICE = "gasPrice"
+    BASE_FEE = "baseFeePerGas"
+    PRIORITY_FEE = "maxPriorityFeePerGas"
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, network: Network, ttl: float = FEE_CACHE_TTL):
+        self.network = network
+        self.ttl = ttl
+        self.latest_block = None
+        self._quotes = {}
+        self._locks = {
+            key: threading.Lock()
+            for key in (self.GAS_PRICE, self.BASE_FEE, self.PRIORITY_FEE)
+        }
+
+    @classmethod
+    def for_network(cls, network: Network) -> "FeeOracle":
+        with cls._registry_lock:
+            oracle = cls._registry.get(network.chain_id)
+            if oracle is None:
+                oracle = cls(network)
+                cls._registry[network.chain_id] = oracle
+            return oracle
+
+    def observe_block(self, block_number: int) -> None:
+        if self.latest_block is not None and block_number <= self.latest_block:
+            return
+
+        self.latest_block = block_number
+        # Quotes taken at an older block are stale as soon as a new one is seen
+        for key, quote in list(self._quotes.items()):
+            if quote.block_number is None or quote.block_number < block_number:
+                self._quotes.pop(key, None)
+
+    def invalidate(self) -> None:
+        self._quotes.clear()
+
+    def _cached(self, key: str) -> int | None:
+        quote = self._quotes.get(key)
+        if quote is None or time.monotonic() - quote.fetched_at > self.ttl:
+            return None
+        return quote.value
+
+    def _store(self, key: str, value: int, block_number: int | None = None) -> int:
+        self._quotes[key] = FeeQuote(
+            int(value),
+            time.monotonic(),
+            block_number if block_number is not None else self.latest_block,
+        )
+        logger.debug(f"{self.network.name} | Fee oracle refreshed {key}: {value}")
+        return int(value)
+
+    def _get(self, key: str, fetch: Callable[[], int]) -> int:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        # Only one caller refreshes a quote, the rest wait for its answer
+        with self._locks[key]:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            return self._store(key, fetch())
+
+    async def _get_async(self, key: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        return self._store(key, await fetch())
+
+    def _refresh_base_fee(self, block) -> int:
+        self.observe_block(block["number"])
+        return self._store(self.BASE_FEE, block["baseFeePerGas"], block["number"])
+
+    def gas_price(self, w3: Web3) -> int:
+        return self._get(self.GAS_PRICE, lambda: w3.eth.gas_price)
+
+    def priority_fee(self, w3: Web3) -> int:
+        return self._get(self.PRIORITY_FEE, lambda: w3.eth.max_priority_fee)
+
+    def base_fee(self, w3: Web3) -> int:
+        cached = self._cached(self.BASE_FEE)
+        if cached is not None:
+            return cached
+
+        with self._locks[self.BASE_FEE]:
+            cached = self._cached(self.BASE_FEE)
+            if cached is not None:
+                return cached
+            return self._refresh_base_fee(w3.eth.get_block("latest"))
+
+    async def gas_price_async(self, w3: AsyncWeb3) -> int:
+        async def fetch():
+            return await w3.eth.gas_price
+
+        return await self._get_async(self.GAS_PRICE, fetch)
+
+    async def priority_fee_async(self, w3: AsyncWeb3) -> int:
+        async def fetch():
+            return await w3.eth.max_priority_fee
+
+        return await self._get_async(self.PRIORITY_FEE, fetch)
+
+    async def base_fee_async(self, w3: AsyncWeb3) -> int:
+        cached = self._cached(self.BASE_FEE)
+        if cached is not None:
+            return cached
+        return self._refresh_base_fee(await w3.eth.get_block("latest"))
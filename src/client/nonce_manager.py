@@ -0,0 +1,90 @@
+import threading
+from typing import Awaitable, Callable
+from loguru import logger
+from eth_typing import ChecksumAddress
+
+NONCE_RESYNC_ERRORS = (
+    "nonce too low",
+    "already known",
+    "invalid nonce",
+    "nonce too high",
+)
+
+
+def is_nonce_error(error: Exception | str) -> bool:
+    message = str(error).lower()
+    return any(pattern in message for pattern in NONCE_RESYNC_ERRORS)
+
+
+class NonceManager:
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, chain_id: int, address: str | ChecksumAddress):
+        self.chain_id = chain_id
+        self.address = address
+        self._next_nonce = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_account(
+        cls, chain_id: int, address: str | ChecksumAddress
+    ) -> "NonceManager":
+        # One manager per (chain, sender) so every client sending from the same
+        # wallet draws from the same local nonce stream
+        key = (chain_id, address.lower())
+        with cls._registry_lock:
+            manager = cls._registry.get(key)
+            if manager is None:
+                manager = cls(chain_id, address)
+                cls._registry[key] = manager
+            return manager
+
+    def allocate(self, fetch_nonce: Callable[[], int]) -> int:
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = int(fetch_nonce())
+                logger.debug(
+                    f"{self.address} | Synced pending nonce on chain {self.chain_id}: {self._next_nonce}"
+                )
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def allocate_async(self, fetch_nonce: Callable[[], Awaitable[int]]) -> int:
+        while True:
+            fetched = None
+            if self._next_nonce is None:
+                fetched = int(await fetch_nonce())
+
+            with self._lock:
+                if self._next_nonce is None:
+                    if fetched is None:
+                        # Stream was resynced while we were not looking, fetch again
+                        continue
+                    self._next_nonce = fetched
+                nonce = self._next_nonce
+                self._next_nonce += 1
+                return nonce
+
+    def seed(self, nonce: int) -> None:
+        # A prefetched pending nonce only counts if the stream has not synced yet
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = int(nonce)
+
+    def release(self, nonce: int) -> None:
+        # A nonce that never reached the mempool can be handed out again only if
+        # nothing was allocated after it, otherwise the stream has a gap
+        with self._lock:
+            if self._next_nonce is not None and nonce == self._next_nonce - 1:
+                self._next_nonce = nonce
+            else:
+                self._next_nonce = None
+
+    def resync(self) -> None:
+        with self._lock:
+            self._next_nonce = None
+        logger.info(
+            f"{self.address} | Nonce stream on chain {self.chain_id} will be resynced"
+        )
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+import pyuseragents
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, Web3
+from web3.types import RPCEndpoint, RPCResponse
+from ..config.constants import (
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT,
+    PROVIDER_CACHE_SIZE,
+    PROVIDER_IDLE_TTL,
+)
+
+
+def build_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PooledHTTPProvider(HTTPProvider):
+    # web3 keeps its own session per (thread, url), which ignores the proxy and
+    # cannot be sized, so requests go straight through the session given here
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        request_kwargs: Any | None = None,
+        session: requests.Session | None = None,
+    ):
+        super().__init__(endpoint_uri=endpoint_uri, request_kwargs=request_kwargs)
+        self.session = session or build_session()
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        # A request without a timeout can hang its worker forever on a dead rpc
+        kwargs = dict(self.get_request_kwargs())
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        response = self.session.post(self.endpoint_uri, data=request_data, **kwargs)
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+@dataclass
+class _CacheEntry:
+    w3: Web3
+    session: requests.Session
+    last_used: float
+
+
+class ProviderCache:
+
+    def __init__(
+        self,
+        max_size: int = PROVIDER_CACHE_SIZE,
+        idle_ttl: float = PROVIDER_IDLE_TTL,
+        pool_size: int = HTTP_POOL_SIZE,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.pool_size = pool_size
+        self._entries = OrderedDict()
+        self._user_agents = {}
+        self._lock = threading.Lock()
+
+    def user_agent_for(self, proxy: str | None) -> str:
+        # Keeping one user agent per proxy lets every wallet behind that proxy hit
+        # the same cache entry, and looks like one client to the rpc
+        with self._lock:
+            user_agent = self._user_agents.get(proxy)
+            if user_agent is None:
+                user_agent = self._user_agents[proxy] = pyuseragents.random()
+            return user_agent
+
+    def get(
+        self, key: tuple, factory: Callable[[requests.Session], Web3]
+    ) -> tuple[Web3, requests.Session]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = now
+                self._entries.move_to_end(key)
+                return entry.w3, entry.session
+
+        session = build_session(self.pool_size)
+        w3 = factory(session)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _CacheEntry(w3, session, now)
+            else:
+                # Another thread built the same provider first
+                session.close()
+            self._entries.move_to_end(key)
+            evicted = self._evict(now)
+
+        for old in evicted:
+            old.session.close()
+        return entry.w3, entry.session
+
+    def _evict(self, now: float) -> list[_CacheEntry]:
+        evicted = []
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_size or now - entry.last_used > (
+                self.idle_ttl
+            ):
+                evicted.append(self._entries.pop(key))
+            else:
+                break
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.session.close()
+
+
+provider_cache = ProviderCache()
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from ..models.networks import Network
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        # Takes the tokens right away and returns how long the caller has to wait
+        # for them, so concurrent callers queue up instead of racing for refills
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= tokens
+
+            if self._tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1) -> None:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(network: Network, rpc: str) -> TokenBucket:
+    # Buckets are keyed by url, so networks listing the same endpoint twice and
+    # every client talking to it draw from one budget
+    with _buckets_lock:
+        bucket = _buckets.get(rpc)
+        if bucket is None:
+            bucket = TokenBucket(network.rps, network.burst)
+            _buckets[rpc] = bucket
+        return bucket
+
+
+def construct_rate_limit_middleware(bucket: TokenBucket):
+    def rate_limit_middleware(make_request, w3):
+        def middleware(method, params):
+            bucket.acquire()
+            return make_request(method, params)
+
+        return middleware
+
+    return rate_limit_middleware
+
+
+def construct_async_rate_limit_middleware(bucket: TokenBucket):
+    async def rate_limit_middleware(make_request, w3):
+        async def middleware(method, params):
+            await bucket.acquire_async()
+            return await make_request(method, params)
+
+        return middleware
+
+    return rate_limit_middleware
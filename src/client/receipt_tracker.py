@@ -0,0 +1,184 @@
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from loguru import logger
+from .batch_transport import BatchTransport
+from .tx_monitor import PendingBroadcast, TxMonitor, poll_broadcasts
+from ..config.constants import RECEIPT_POLL_INTERVAL, RECEIPT_TIMEOUT
+from ..utils.metrics.metrics import STAGE_LATENCY, metrics
+
+
+@dataclass
+class TxOutcome:
+    tx_hash: str
+    status: str
+    receipt: dict | None = None
+    context: Any = None
+
+
+@dataclass
+class _PendingTx:
+    tx_hash: str
+    submitted_at: float
+    context: Any = field(default=None)
+    broadcast: PendingBroadcast | None = None
+    waiting_since: float | None = None
+    key: int | None = None
+
+    def __post_init__(self):
+        if self.waiting_since is None:
+            self.waiting_since = self.submitted_at
+
+    @property
+    def hashes(self) -> list[str]:
+        return self.broadcast.hashes if self.broadcast else [self.tx_hash]
+
+
+class ReceiptTracker:
+    SUCCESS = "success"
+    REVERTED = "reverted"
+    TIMEOUT = "timeout"
+
+    def __init__(
+        self,
+        transport: BatchTransport,
+        on_result: Callable[[TxOutcome], None] | None = None,
+        poll_interval: float = RECEIPT_POLL_INTERVAL,
+        timeout: float = RECEIPT_TIMEOUT,
+        on_block: Callable[[int], None] | None = None,
+        monitor: TxMonitor | None = None,
+    ):
+        self.transport = transport
+        self.on_result = on_result
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.on_block = on_block
+        self.monitor = monitor
+        self.results = queue.Queue()
+
+        # Keyed per track call, rows paid by one disperse chunk share a hash
+        self._pending = {}
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "ReceiptTracker":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="receipt-tracker", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def track(
+        self,
+        tx_hash: str,
+        context: Any = None,
+        broadcast: PendingBroadcast | None = None,
+    ) -> None:
+        with self._lock:
+            key = next(self._keys)
+            self._pending[key] = _PendingTx(
+                tx_hash, time.monotonic(), context, broadcast, key=key
+            )
+            self._idle.clear()
+        self.start()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def join(self, timeout: float | None = None) -> bool:
+        return self._idle.wait(timeout)
+
+    def stop(self, wait: bool = True) -> None:
+        if wait:
+            self.join()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                pending = list(self._pending.values())
+
+            if pending:
+                self._poll(pending)
+
+            self._stop.wait(self.poll_interval)
+
+    def _poll(self, pending: list[_PendingTx]) -> None:
+        try:
+            # The head block is read along with the receipts so the monitor can
+            # tell how long a transaction has been waiting
+            block, landed = poll_broadcasts(
+                self.transport, [tx.hashes for tx in pending]
+            )
+        except Exception as e:
+            logger.warning(
+                f"Receipt tracker | Error polling {self.transport.rpc}: {str(e)}"
+            )
+            block, landed = None, [None] * len(pending)
+
+        now = time.monotonic()
+
+        # Only the lowest unmined nonce of a sender can be stuck on its own fee,
+        # the ones above it are waiting for it and replacing them would not help
+        lowest = {}
+        for tx, found in zip(pending, landed):
+            if not found and tx.broadcast is not None:
+                first = lowest.get(tx.broadcast.sender)
+                if first is None or tx.broadcast.nonce < first.broadcast.nonce:
+                    lowest[tx.broadcast.sender] = tx
+
+        for tx, found in zip(pending, landed):
+            if found:
+                tx_hash, receipt = found
+                if self.on_block is not None and receipt.get("blockNumber"):
+                    self.on_block(int(receipt["blockNumber"], 16))
+                metrics.observe(STAGE_LATENCY, now - tx.submitted_at, stage="confirm")
+                status = (
+                    self.SUCCESS
+                    if int(receipt.get("status", "0x0"), 16) == 1
+                    else self.REVERTED
+                )
+                self._finish(tx, TxOutcome(tx_hash, status, receipt, tx.context))
+            elif now - tx.waiting_since > self.timeout:
+                self._finish(
+                    tx, TxOutcome(tx.hashes[-1], self.TIMEOUT, None, tx.context)
+                )
+            elif self.monitor is not None and tx.broadcast is not None:
+                first = lowest[tx.broadcast.sender]
+                blocked = first is not tx
+                # A replacement restarts the timeout so the tracker never gives up
+                # between two of them, and a nonce queued behind a lower one waits
+                # as long as that one does
+                if self.monitor.check(tx.broadcast, block, blocked):
+                    tx.waiting_since = now
+                elif blocked:
+                    tx.waiting_since = max(tx.waiting_since, first.waiting_since)
+
+    def _finish(self, tx: _PendingTx, outcome: TxOutcome) -> None:
+        with self._lock:
+            if self._pending.pop(tx.key, None) is None:
+                return
+
+        self.results.put(outcome)
+        if self.on_result is not None:
+            try:
+                self.on_result(outcome)
+            except Exception as e:
+                logger.error(f"Receipt tracker | Result callback failed: {str(e)}")
+
+        with self._lock:
+            if not self._pending:
+                self._idle.set()
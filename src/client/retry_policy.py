@@ -0,0 +1,89 @@
+import random
+from dataclasses import dataclass
+from .endpoint_pool import is_rate_limit_error
+from .nonce_manager import is_nonce_error
+from ..config.constants import (
+    NONCE_RETRIES,
+    RATE_LIMIT_RETRIES,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    TRANSIENT_RETRIES,
+    UNDERPRICED_RETRIES,
+)
+
+TRANSIENT = "transient"
+RATE_LIMITED = "rate_limited"
+NONCE = "nonce"
+UNDERPRICED = "underpriced"
+FATAL = "fatal"
+
+UNDERPRICED_ERRORS = (
+    "underpriced",
+    "fee too low",
+    "gas price too low",
+    "gas price below minimum",
+    "less than block base fee",
+)
+FATAL_ERRORS = (
+    "insufficient funds",
+    "intrinsic gas too low",
+    "exceeds block gas limit",
+    "gas limit reached",
+    "invalid sender",
+    "invalid chain id",
+    "execution reverted",
+    "cannot serialize negative",
+)
+
+
+class FatalError(Exception):
+    pass
+
+
+def classify_error(error: Exception | str) -> str:
+    if isinstance(error, FatalError):
+        return FATAL
+    message = str(error).lower()
+
+    if is_rate_limit_error(message):
+        return RATE_LIMITED
+    # "replacement transaction underpriced" is a fee problem, not a nonce one
+    if any(pattern in message for pattern in UNDERPRICED_ERRORS):
+        return UNDERPRICED
+    if is_nonce_error(message):
+        return NONCE
+    if any(pattern in message for pattern in FATAL_ERRORS):
+        return FATAL
+    if isinstance(error, (TypeError, KeyError, AttributeError)):
+        return FATAL
+    return TRANSIENT
+
+
+@dataclass
+class RetryPolicy:
+    transient: int = TRANSIENT_RETRIES
+    rate_limited: int = RATE_LIMIT_RETRIES
+    nonce: int = NONCE_RETRIES
+    underpriced: int = UNDERPRICED_RETRIES
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+
+    def attempts(self, kind: str) -> int:
+        return getattr(self, kind, 0) if kind != FATAL else 0
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        return attempt < self.attempts(kind)
+
+    def delay(self, kind: str, attempt: int) -> float:
+        # Nonce and fee errors are fixed by changing the transaction, waiting
+        # does not help them
+        if kind in (NONCE, UNDERPRICED, FATAL):
+            return 0.0
+
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        if kind == RATE_LIMITED:
+            ceiling = min(self.max_delay, ceiling * 2)
+        return random.uniform(ceiling / 2, ceiling)
+
+
+default_policy = RetryPolicy()
@@ -0,0 +1,67 @@
+from collections import Counter
+from loguru import logger
+from .retry_policy import NONCE, RATE_LIMITED, TRANSIENT, classify_error
+from ..utils.metrics.metrics import metrics
+
+
+class SendPolicy:
+    # Endpoint switching and broadcast error handling shared by the sync and the
+    # async client, which only differ in how they wait and talk to the node
+
+    def _switch_provider(self) -> float:
+        # Moves to the best other endpoint, or returns how long the current one
+        # stays in cooldown when there is nothing to move to
+        rpc = self.endpoint_pool.best(exclude={self.rpc})
+
+        if rpc is not None:
+            self.rpc = rpc
+            self.w3 = self._make_w3(self.rpc)
+            return 0.0
+
+        wait_time = self.endpoint_pool.wait_time(self.rpc)
+        logger.warning(
+            f"RPC error on {self.rpc} and no replacement rpc, waiting {wait_time:.1f}s"
+        )
+        return wait_time
+
+    @staticmethod
+    def _already_sent(error: Exception, attempts: Counter) -> bool | None:
+        # True when the rejection proves the node has the transaction, None when
+        # only a lookup can tell (a nonce error after an attempt that looked failed)
+        if "already known" in str(error).lower():
+            return True
+        if classify_error(error) == NONCE and attempts:
+            return None
+        return False
+
+    def _broadcast_retry_delay(
+        self, error: Exception, attempts: Counter
+    ) -> float | None:
+        # Re-sending the same raw transaction is always safe, so transient and
+        # rate limit failures are retried without touching nonce or fee. None
+        # means the error is final
+        kind = classify_error(error)
+        if kind not in (TRANSIENT, RATE_LIMITED) or not (
+            self.retry_policy.should_retry(kind, attempts[kind])
+        ):
+            return None
+
+        delay = self.retry_policy.delay(kind, attempts[kind])
+        attempts[kind] += 1
+        metrics.count_retry("broadcast", error)
+        self.logger.warning(
+            f"{self.account_name} | {self.address} | {self.module_name} | {kind} error from {self.rpc}, resending in {delay:.1f}s: {str(error)}"
+        )
+        return delay
+
+    def handle_send_error(self, error: Exception, nonce: int = None) -> str:
+        kind = classify_error(error)
+        self.logger.warning(
+            f"{self.account_name} | {self.address} | {self.module_name} | Broadcast rejected by {self.rpc} ({kind}): {str(error)}"
+        )
+        if kind == NONCE:
+            if self.nonce_manager:
+                self.nonce_manager.resync()
+        elif self.nonce_manager and nonce is not None:
+            self.nonce_manager.release(nonce)
+        return kind
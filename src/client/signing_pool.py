@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from eth_account import Account
+from hexbytes import HexBytes
+from ..config.constants import SIGNING_MIN_CHUNK, SIGNING_WORKERS
+
+
+def _sign_slice(job: tuple[str, list[dict]]) -> list[bytes]:
+    private_key, tx_dicts = job
+    return [
+        bytes(Account.sign_transaction(tx_dict, private_key).rawTransaction)
+        for tx_dict in tx_dicts
+    ]
+
+
+def _split(indices: list[int], parts: int) -> list[list[int]]:
+    size, extra = divmod(len(indices), parts)
+    slices, start = [], 0
+    for part in range(parts):
+        end = start + size + (1 if part < extra else 0)
+        slices.append(indices[start:end])
+        start = end
+    return slices
+
+
+def sign_transactions(
+    tx_dicts: list[dict],
+    private_keys: str | list[str],
+    max_workers: int | None = None,
+    min_chunk: int = SIGNING_MIN_CHUNK,
+) -> list[HexBytes]:
+    if max_workers is None:
+        max_workers = min(SIGNING_WORKERS, os.cpu_count() or 1)
+    if isinstance(private_keys, str):
+        private_keys = [private_keys] * len(tx_dicts)
+    if len(private_keys) != len(tx_dicts):
+        raise ValueError("Every transaction needs exactly one private key")
+
+    if len(tx_dicts) < min_chunk or max_workers <= 1:
+        # Not worth paying for process startup
+        return [
+            HexBytes(Account.sign_transaction(tx_dict, private_key).rawTransaction)
+            for tx_dict, private_key in zip(tx_dicts, private_keys)
+        ]
+
+    groups = {}
+    for i, private_key in enumerate(private_keys):
+        groups.setdefault(private_key, []).append(i)
+
+    # A key is only split across processes when it alone has enough transactions
+    # to keep more than one worker busy, so most keys reach exactly one worker
+    slices = []
+    for private_key, indices in groups.items():
+        parts = max(1, min(max_workers, len(indices) // min_chunk))
+        slices.extend((private_key, part) for part in _split(indices, parts))
+
+    jobs = [
+        (private_key, [tx_dicts[i] for i in indices]) for private_key, indices in slices
+    ]
+    raw_transactions = [None] * len(tx_dicts)
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        chunksize = max(1, len(jobs) // (max_workers * 4))
+        for (_, indices), signed in zip(
+            slices, executor.map(_sign_slice, jobs, chunksize=chunksize)
+        ):
+            for i, raw in zip(indices, signed):
+                raw_transactions[i] = HexBytes(raw)
+
+    return raw_transactions
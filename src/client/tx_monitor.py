@@ -0,0 +1,227 @@
+import math
+import time
+from dataclasses import dataclass, field
+from loguru import logger
+from .batch_transport import BatchTransport, RPCError
+from .retry_policy import NONCE, RATE_LIMITED, TRANSIENT, FatalError, classify_error
+from ..config.constants import (
+    GAS_PRICE_MULTIPLIER,
+    MAX_TX_REPLACEMENTS,
+    STUCK_TX_BLOCKS,
+    TX_MONITOR_POLL_INTERVAL,
+    UNDERPRICED_BUMP,
+)
+from ..utils.journal.journal import BROADCAST
+from ..utils.metrics.metrics import REPLACEMENTS, metrics
+
+
+def bump_fee(tx_data: dict, bump: float, market: int, full_balance: bool = False):
+    # Both fee fields go up by at least the bump, rounded up so the result never
+    # falls short of the node's replacement rule
+    if "gasPrice" in tx_data:
+        old_price = tx_data["gasPrice"]
+        tx_data["gasPrice"] = max(math.ceil(old_price * bump), market)
+        extra_fee = (tx_data["gasPrice"] - old_price) * tx_data["gas"]
+    else:
+        old_price = tx_data["maxFeePerGas"]
+        tx_data["maxPriorityFeePerGas"] = math.ceil(
+            tx_data["maxPriorityFeePerGas"] * bump
+        )
+        tx_data["maxFeePerGas"] = max(math.ceil(old_price * bump), market)
+        extra_fee = (tx_data["maxFeePerGas"] - old_price) * tx_data["gas"]
+
+    if full_balance:
+        # A sweep pays the higher fee out of the amount it sends
+        tx_data["value"] -= extra_fee
+        if tx_data["value"] <= 0:
+            raise FatalError("Balance does not cover the bumped network fee")
+
+
+@dataclass
+class PendingBroadcast:
+    tx_data: dict
+    hashes: list[str]
+    full_balance: bool = False
+    journal_entries: list[tuple] = field(default_factory=list)
+    sent_block: int | None = None
+    replacements: int = 0
+
+    @property
+    def nonce(self) -> int:
+        return self.tx_data["nonce"]
+
+    @property
+    def sender(self) -> str:
+        return str(self.tx_data.get("from", "")).lower()
+
+    @property
+    def tx_hash(self) -> str:
+        return self.hashes[-1]
+
+
+def poll_broadcasts(
+    transport: BatchTransport, broadcasts: list[list[str]]
+) -> tuple[int | None, list[tuple[str, dict] | None]]:
+    # One batch: the head block plus a receipt for every hash sent under each
+    # nonce, whichever of them was mined is the one that counts
+    calls = [("eth_blockNumber", [])] + [
+        ("eth_getTransactionReceipt", [tx_hash])
+        for hashes in broadcasts
+        for tx_hash in hashes
+    ]
+    replies = transport.call_many(calls)
+
+    block = replies[0]
+    block = None if isinstance(block, RPCError) or block is None else int(block, 16)
+
+    landed, i = [], 1
+    for hashes in broadcasts:
+        found = None
+        for tx_hash in hashes:
+            receipt = replies[i]
+            i += 1
+            if receipt and not isinstance(receipt, RPCError):
+                found = (tx_hash, receipt)
+        landed.append(found)
+    return block, landed
+
+
+class TxMonitor:
+    # Every broadcast is remembered with its nonce and fee. One that is still
+    # unmined stuck_blocks after it was seen is sent again under the same nonce
+    # with a fee the network's replacement rule accepts
+
+    def __init__(
+        self,
+        client,
+        stuck_blocks: int = STUCK_TX_BLOCKS,
+        max_replacements: int = MAX_TX_REPLACEMENTS,
+    ):
+        self.client = client
+        self.stuck_blocks = stuck_blocks
+        self.max_replacements = max_replacements
+
+    @property
+    def enabled(self) -> bool:
+        return self.client.network.replacement_bump is not None and (
+            self.stuck_blocks > 0
+        )
+
+    def record(
+        self,
+        tx_hash: str,
+        tx_data: dict,
+        full_balance: bool = False,
+        journal_entries: list[tuple] | None = None,
+    ) -> PendingBroadcast:
+        return PendingBroadcast(
+            dict(tx_data), [tx_hash], full_balance, list(journal_entries or [])
+        )
+
+    def check(
+        self, pending: PendingBroadcast, block: int | None, blocked: bool = False
+    ) -> str | None:
+        if block is None:
+            return None
+        if pending.sent_block is None or (blocked and not self.below_market(pending)):
+            # A nonce queued behind a lower unmined one cannot be mined yet, so it
+            # only starts counting as stuck once it is the lowest, unless its own
+            # fee has fallen behind the market as well
+            pending.sent_block = block
+            return None
+        if (
+            not self.enabled
+            or block - pending.sent_block < self.stuck_blocks
+            or pending.replacements >= self.max_replacements
+        ):
+            return None
+        return self.replace(pending, block)
+
+    def below_market(self, pending: PendingBroadcast) -> bool:
+        client = self.client
+        try:
+            market = int(client.fee_oracle.gas_price(client.w3) * GAS_PRICE_MULTIPLIER)
+        except Exception:
+            return False
+        tx_data = pending.tx_data
+        return tx_data.get("gasPrice", tx_data.get("maxFeePerGas", 0)) < market
+
+    def replace(self, pending: PendingBroadcast, block: int) -> str | None:
+        client = self.client
+        tx_data = dict(pending.tx_data)
+        pending.replacements += 1
+        pending.sent_block = block
+
+        try:
+            client.fee_oracle.invalidate()
+            market = int(client.fee_oracle.gas_price(client.w3) * GAS_PRICE_MULTIPLIER)
+            bump_fee(
+                tx_data,
+                max(UNDERPRICED_BUMP, client.network.replacement_bump),
+                market,
+                pending.full_balance,
+            )
+            signed = client.sign_transaction(tx_data)
+            tx_hash = client.broadcast(signed).hex()
+        except FatalError as e:
+            pending.replacements = self.max_replacements
+            logger.warning(
+                f"{client.account_name} | {client.address} | nonce {pending.nonce} is stuck but cannot be replaced: {str(e)}"
+            )
+            return None
+        except Exception as e:
+            # A nonce error means one of the earlier hashes was mined meanwhile,
+            # an underpriced one that the next bump has to start higher
+            if classify_error(e) != NONCE:
+                pending.tx_data = tx_data
+            logger.warning(
+                f"{client.account_name} | {client.address} | Replacement for nonce {pending.nonce} rejected: {str(e)}"
+            )
+            return None
+
+        pending.tx_data = tx_data
+        pending.hashes.append(tx_hash)
+        metrics.inc(REPLACEMENTS, network=client.network.name)
+        if client.journal is not None:
+            # A disperse chunk pays several journal entries under one nonce
+            for recipient, amount in pending.journal_entries:
+                client.journal.mark(
+                    client.network.name,
+                    client.address,
+                    recipient,
+                    amount,
+                    BROADCAST,
+                    tx_hash,
+                )
+        logger.warning(
+            f"{client.account_name} | {client.address} | nonce {pending.nonce} not mined after {self.stuck_blocks} blocks, replaced by {tx_hash} ({pending.replacements}/{self.max_replacements})"
+        )
+        return tx_hash
+
+    def wait(
+        self,
+        pending: PendingBroadcast,
+        timeout: float,
+        poll_interval: float = TX_MONITOR_POLL_INTERVAL,
+    ) -> tuple[str, dict] | None:
+        deadline = time.monotonic() + timeout
+        attempts = 0
+        while time.monotonic() < deadline:
+            try:
+                block, (landed,) = poll_broadcasts(
+                    self.client.batch_transport, [pending.hashes]
+                )
+            except Exception as e:
+                # A failed poll says nothing about the transaction
+                if classify_error(e) not in (TRANSIENT, RATE_LIMITED):
+                    raise
+                attempts += 1
+                metrics.count_retry("tx_monitor", e)
+                time.sleep(self.client.retry_policy.delay(TRANSIENT, attempts))
+                continue
+
+            if landed is not None:
+                return landed
+            self.check(pending, block)
+            time.sleep(poll_interval)
+        return None
@@ -0,0 +1,14 @@
+DISPERSE_ABI = [
+    {
+        "constant": False,
+        "inputs": [
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"},
+        ],
+        "name": "disperseEther",
+        "outputs": [],
+        "payable": True,
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
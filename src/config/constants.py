@@ -4,3 +4,63 @@ MAX_DST_WAIT_TIME = 300
 GAS_PRICE_MULTIPLIER = 1.01
 ACCEPTABLE_L1_GWEI = 2
 MAX_RETRIES = 15
+RECEIPT_TIMEOUT = 180
+RECEIPT_POLL_INTERVAL = 2
+ASYNC_CONCURRENCY = 50
+FEE_CACHE_TTL = 12
+RPC_BATCH_SIZE = 100
+DISPERSE_GAS_TARGET = 10_000_000
+DISPERSE_BASE_GAS = 50_000
+DISPERSE_GAS_PER_RECIPIENT = 35_000
+JOURNAL_PATH = "results/journal.sqlite3"
+INGEST_CHUNK_SIZE = 1000
+SIGNING_WORKERS = 4
+SIGNING_MIN_CHUNK = 64
+HEDGE_READS = True
+HEDGE_LATENCY_BUDGET = 1.5
+ENDPOINT_EWMA_ALPHA = 0.2
+ENDPOINT_COOLDOWN = 30
+ENDPOINT_RATE_LIMIT_COOLDOWN = 10
+BALANCE_RETRIES = 5
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 60
+PROVIDER_CACHE_SIZE = 256
+PROVIDER_IDLE_TTL = 300
+MANY_TO_ONE_WORKERS = 8
+TRANSFER_GAS = 25000
+BROADCAST_BATCH_SIZE = 50
+BATCH_FILE_PATH = "results/signedBatch.jsonl"
+METRICS_LATENCY_BUCKETS = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    180,
+)
+METRICS_JSON_PATH = "results/metrics.json"
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+TRANSIENT_RETRIES = 5
+RATE_LIMIT_RETRIES = 8
+NONCE_RETRIES = 3
+UNDERPRICED_RETRIES = 3
+UNDERPRICED_BUMP = 1.125
+ENDPOINT_BREAKER_THRESHOLD = 5
+ENDPOINT_BREAKER_MAX_COOLDOWN = 300
+ADDRESS_CACHE_PATH = "results/addressCache.json"
+DERIVE_MIN_CHUNK = 256
+SWEEP_DUST_FLOOR = 0
+STUCK_TX_BLOCKS = 10
+MAX_TX_REPLACEMENTS = 3
+TX_MONITOR_POLL_INTERVAL = 0.25
+HOT_WALLETS = 4
+HOT_WALLETS_PATH = "results/hotWallets.txt"
+HOT_WALLET_FEE_MARGIN = 1.5
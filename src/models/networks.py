@@ -11,12 +11,24 @@ class Network:
         scanner,
         eip1559_support: bool = False,
         token: str = "ETH",
+        rps: float = 10,
+        burst: int = 20,
+        disperse_contract: str | None = None,
+        transfer_gas: int | None = 21000,
+        replacement_bump: float | None = 1.1,
     ):
         self.name = name
         self.chain_id = chain_id
         self.rpc_list = rpc_list
         self.scanner = scanner
         self.token = token
+        self.rps = rps
+        self.burst = burst
+        self.disperse_contract = disperse_contract
+        self.transfer_gas = transfer_gas
+        # Minimum fee increase the mempool accepts for a same-nonce replacement,
+        # None where pending transactions cannot be replaced
+        self.replacement_bump = replacement_bump
 
 
 @dataclass
@@ -30,6 +42,7 @@ class Networks:
         ],
         scanner="https://etherscan.io",
         eip1559_support=True,
+        disperse_contract="0xD152f549545093347A162Dce210e7293f1452150",
     )
     Base = Network(
         name="Base",
@@ -75,6 +88,12 @@ class Networks:
         eip1559_support=True,
         token="ETH",
         scanner="https://arbiscan.io/",
+        # Gas limits on Arbitrum include the L1 data cost, so they always need an
+        # estimate
+        transfer_gas=None,
+        # The sequencer orders first come first served, a higher fee does not
+        # replace anything
+        replacement_bump=None,
     )
     Zora = Network(
         name="Zora",
@@ -114,6 +133,8 @@ class Networks:
         eip1559_support=False,
         scanner="https://testnet.monadexplorer.com",
         token="MON",
+        rps=5,
+        burst=10,
     )
     Binance = Network(
         name="Binance Smart Chain",
@@ -153,6 +174,7 @@ class Networks:
             "Scroll": Networks.Scroll,
             "Bitlayer": Networks.Bitlayer,
             "Binance Smart Chain": Networks.Binance,
+            "Monad Testnet": Networks.Monad,
         }.get(name, None)
 
     @staticmethod
@@ -183,4 +205,5 @@ class Networks:
             7777777: Networks.Zora,
             534352: Networks.Scroll,
             200901: Networks.Bitlayer,
+            10143: Networks.Monad,
         }.get(chain_id, None)
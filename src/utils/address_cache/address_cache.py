@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from eth_account import Account
+from loguru import logger
+from ...config.constants import ADDRESS_CACHE_PATH, DERIVE_MIN_CHUNK, SIGNING_WORKERS
+
+
+def _derive(private_key: str) -> str | None:
+    try:
+        return Account.from_key(private_key).address
+    except Exception:
+        return None
+
+
+def _derive_slice(private_keys: list[str]) -> list[str | None]:
+    return [_derive(private_key) for private_key in private_keys]
+
+
+def derive_addresses(
+    private_keys: list[str],
+    max_workers: int | None = None,
+    min_chunk: int = DERIVE_MIN_CHUNK,
+) -> list[str | None]:
+    if max_workers is None:
+        max_workers = min(SIGNING_WORKERS, os.cpu_count() or 1)
+    if len(private_keys) < min_chunk or max_workers <= 1:
+        return _derive_slice(private_keys)
+
+    size = max(min_chunk, -(-len(private_keys) // (max_workers * 4)))
+    slices = [private_keys[i : i + size] for i in range(0, len(private_keys), size)]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(slices))) as executor:
+        return [
+            address
+            for derived in executor.map(_derive_slice, slices)
+            for address in derived
+        ]
+
+
+class AddressCache:
+    # Maps a salted fingerprint of each key to its address, so the file never
+    # holds anything a key could be recovered from
+
+    def __init__(self, path: str = ADDRESS_CACHE_PATH):
+        self.path = path
+        self.salt = None
+        self.addresses = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.salt = bytes.fromhex(data["salt"])
+            self.addresses = data["addresses"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable address cache {self.path}: {str(e)}")
+
+        if self.salt is None:
+            self.salt = secrets.token_bytes(16)
+            self.addresses = {}
+
+    def fingerprint(self, private_key: str) -> str | None:
+        body = private_key[2:] if private_key.startswith("0x") else private_key
+        try:
+            key_bytes = bytes.fromhex(body)
+        except ValueError:
+            return None
+        return hashlib.blake2b(key_bytes, key=self.salt, digest_size=20).hexdigest()
+
+    def resolve(self, private_keys: list[str]) -> list[str | None]:
+        fingerprints = [self.fingerprint(private_key) for private_key in private_keys]
+        with self._lock:
+            missing = {
+                fingerprint: private_key
+                for fingerprint, private_key in zip(fingerprints, private_keys)
+                if fingerprint is not None and fingerprint not in self.addresses
+            }
+
+        if missing:
+            logger.info(
+                f"Deriving {len(missing)} addresses, {len(private_keys) - len(missing)} came from the cache"
+            )
+            derived = derive_addresses(list(missing.values()))
+            with self._lock:
+                for fingerprint, address in zip(missing, derived):
+                    if address is not None:
+                        self.addresses[fingerprint] = address
+                        self._dirty = True
+
+        with self._lock:
+            return [self.addresses.get(fingerprint) for fingerprint in fingerprints]
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"salt": self.salt.hex(), "addresses": self.addresses}
+            self._dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+def load_addresses(
+    private_keys: list[str], path: str = ADDRESS_CACHE_PATH
+) -> list[str | None]:
+    cache = AddressCache(path)
+    addresses = cache.resolve(private_keys)
+    cache.save()
+    return addresses
@@ -1,21 +1,59 @@
+import asyncio
 import functools
+import time
+from collections import Counter
 from loguru import logger
-from ..helpers.helpers import sleeping
+from ..metrics.metrics import metrics
+from ...client.retry_policy import classify_error, default_policy
 from ...config.constants import MAX_RETRIES
 
 
 def retry_execution(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        attempts = Counter()
         for _ in range(MAX_RETRIES):
             try:
                 res = func(*args, **kwargs)
                 return res
             except Exception as e:
-                logger.warning(f"{func.__name__} - exception: {str(e)}")
-                if "insufficient funds" in str(e):
+                kind = classify_error(e)
+                if not default_policy.should_retry(kind, attempts[kind]):
+                    logger.warning(f"{func.__name__} - {kind} exception: {str(e)}")
                     return
-                sleeping(mode=1)
+                delay = default_policy.delay(kind, attempts[kind])
+                attempts[kind] += 1
+                metrics.count_retry(func.__name__, e)
+                logger.warning(
+                    f"{func.__name__} - {kind} exception, retrying in {delay:.1f}s: {str(e)}"
+                )
+                time.sleep(delay)
+        else:
+            return
+
+    return wrapper
+
+
+def async_retry_execution(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        attempts = Counter()
+        for _ in range(MAX_RETRIES):
+            try:
+                res = await func(*args, **kwargs)
+                return res
+            except Exception as e:
+                kind = classify_error(e)
+                if not default_policy.should_retry(kind, attempts[kind]):
+                    logger.warning(f"{func.__name__} - {kind} exception: {str(e)}")
+                    return
+                delay = default_policy.delay(kind, attempts[kind])
+                attempts[kind] += 1
+                metrics.count_retry(func.__name__, e)
+                logger.warning(
+                    f"{func.__name__} - {kind} exception, retrying in {delay:.1f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
         else:
             return
 
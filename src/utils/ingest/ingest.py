@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, localcontext
+from typing import Iterator
+from eth_typing import ChecksumAddress
+from eth_utils import is_checksum_address, is_hex_address, to_checksum_address
+from loguru import logger
+from ..metrics.metrics import STAGE_LATENCY, metrics
+from ...config.constants import INGEST_CHUNK_SIZE
+
+WEI_DECIMALS = 18
+
+
+@dataclass
+class TransferRow:
+    address: ChecksumAddress
+    amount_wei: int
+    line_num: int
+    duplicate_of: int | None = None
+
+
+@dataclass
+class MergedRecipient:
+    address: ChecksumAddress
+    amount_wei: int
+    line_nums: list[int]
+
+
+def parse_amount_wei(text: str) -> int:
+    try:
+        amount = Decimal(text.strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text}")
+
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError(f"Invalid amount: {text}")
+
+    with localcontext() as ctx:
+        # uint256 needs 78 digits, the default context would silently round
+        ctx.prec = 80
+        wei = amount.scaleb(WEI_DECIMALS)
+    if wei != wei.to_integral_value():
+        raise ValueError(f"Amount has more than {WEI_DECIMALS} decimals: {text}")
+    return int(wei)
+
+
+def format_wei(amount_wei: int) -> str:
+    with localcontext() as ctx:
+        ctx.prec = 80
+        return format(Decimal(amount_wei).scaleb(-WEI_DECIMALS).normalize(), "f")
+
+
+def parse_address(text: str) -> ChecksumAddress:
+    address = text.strip()
+    if not address.startswith("0x") or not is_hex_address(address):
+        raise ValueError(f"Invalid address format: {address}")
+
+    # Single-case addresses carry no checksum, mixed case ones must be valid EIP-55
+    body = address[2:]
+    if body != body.lower() and body != body.upper():
+        if not is_checksum_address(address):
+            raise ValueError(f"Invalid EIP-55 checksum: {address}")
+        return address
+    return to_checksum_address(address)
+
+
+class TransferIngest:
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = INGEST_CHUNK_SIZE,
+        input_format: str | None = None,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.input_format = input_format or self._detect_format(path)
+        self.rows_read = 0
+        self.skipped = []
+        self.duplicates = []
+        self.merged = []
+        self._seen = {}
+
+    @staticmethod
+    def _detect_format(path: str) -> str:
+        extension = os.path.splitext(path)[1].lower()
+        return {".tsv": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(
+            extension, "csv"
+        )
+
+    def _split(self, line: str) -> tuple[str, str]:
+        if self.input_format == "jsonl":
+            # Numbers are kept as their source text so json floats never round them
+            record = json.loads(line, parse_float=str, parse_int=str)
+            return str(record["address"]), str(record["amount"])
+
+        parts = line.split("\t" if self.input_format == "tsv" else ",")
+        if len(parts) != 2:
+            raise ValueError(f"Expected 2 parts, got {len(parts)}")
+        return parts[0], parts[1]
+
+    def _parse_line(self, line_num: int, line: str) -> TransferRow | None:
+        address, amount = self._split(line)
+        row = TransferRow(parse_address(address), parse_amount_wei(amount), line_num)
+
+        key = row.address.lower()
+        first_line = self._seen.get(key)
+        if first_line is None:
+            self._seen[key] = line_num
+        else:
+            row.duplicate_of = first_line
+            self.duplicates.append(row)
+        return row
+
+    def _lines(self) -> Iterator[tuple[int, str]]:
+        with open(self.path, "r") as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    yield line_num, line
+
+    def chunks(self) -> Iterator[list[TransferRow]]:
+        chunk = []
+        for line_num, line in self._lines():
+            started_at = time.perf_counter()
+            try:
+                row = self._parse_line(line_num, line)
+            except Exception as e:
+                if (
+                    line_num == 1
+                    and self.input_format != "jsonl"
+                    and not line.startswith("0x")
+                ):
+                    # Header row of a csv/tsv export
+                    continue
+                error_msg = f"Line {line_num}: '{line}' - Error: {str(e)}"
+                logger.error(error_msg)
+                self.skipped.append(error_msg)
+                continue
+
+            metrics.observe(
+                STAGE_LATENCY, time.perf_counter() - started_at, stage="parse"
+            )
+            self.rows_read += 1
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def __iter__(self) -> Iterator[TransferRow]:
+        for chunk in self.chunks():
+            yield from chunk
+
+    def coalesced(self) -> list[TransferRow]:
+        # Rows are folded into the first one for their checksummed address, so
+        # every recipient gets one transfer carrying the summed amount
+        plan = {}
+        line_nums = {}
+        for row in self:
+            first = plan.get(row.address)
+            if first is None:
+                plan[row.address] = TransferRow(
+                    row.address, row.amount_wei, row.line_num
+                )
+                line_nums[row.address] = [row.line_num]
+            else:
+                first.amount_wei += row.amount_wei
+                line_nums[row.address].append(row.line_num)
+
+        self.merged = [
+            MergedRecipient(address, plan[address].amount_wei, lines)
+            for address, lines in line_nums.items()
+            if len(lines) > 1
+        ]
+        return list(plan.values())
+
+    def coalesced_chunks(self) -> Iterator[list[TransferRow]]:
+        rows = self.coalesced()
+        for i in range(0, len(rows), self.chunk_size):
+            yield rows[i : i + self.chunk_size]
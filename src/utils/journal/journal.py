@@ -0,0 +1,234 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from ...client.batch_transport import RPCError
+from ...config.constants import JOURNAL_PATH
+
+PLANNED = "planned"
+SIGNED = "signed"
+BROADCAST = "broadcast"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+
+@dataclass
+class JournalEntry:
+    recipient: str
+    amount: str
+    state: str
+    tx_hash: str | None = None
+
+
+class TransferJournal:
+
+    def __init__(self, run_id: str, path: str = JOURNAL_PATH):
+        self.run_id = run_id
+        self.path = path
+        self._lock = threading.Lock()
+        # Receipt callbacks land on the tracker thread, so the connection is shared
+        # between threads and every access goes through the lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                network TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                amount TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                tx_hash TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS transfers (
+                network TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                amount TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                tx_hash TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (network, sender, recipient, amount, run_id)
+            ) WITHOUT ROWID;
+            """)
+        self._conn.commit()
+
+    def mark(
+        self,
+        network: str,
+        sender: str,
+        recipient: str,
+        amount,
+        state: str,
+        tx_hash: str | None = None,
+    ) -> None:
+        key = (network, sender.lower(), recipient.lower(), str(amount), self.run_id)
+        now = time.time()
+
+        with self._lock, self._conn:
+            # Events is the append-only history, transfers keeps the latest state
+            # of every key so resume is a primary key lookup
+            self._conn.execute(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, state, tx_hash, now),
+            )
+            self._conn.execute(
+                """
+                INSERT INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (network, sender, recipient, amount, run_id) DO UPDATE SET
+                    state = excluded.state,
+                    tx_hash = COALESCE(excluded.tx_hash, transfers.tx_hash),
+                    updated_at = excluded.updated_at
+                """,
+                (*key, state, tx_hash, now),
+            )
+
+    def get(
+        self, network: str, sender: str, recipient: str, amount
+    ) -> JournalEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT recipient, amount, state, tx_hash FROM transfers
+                WHERE network = ? AND sender = ? AND recipient = ? AND amount = ?
+                    AND run_id = ?
+                """,
+                (network, sender.lower(), recipient.lower(), str(amount), self.run_id),
+            ).fetchone()
+        return JournalEntry(*row) if row else None
+
+    def load(self, network: str, sender: str | None = None) -> dict:
+        # One scan per run instead of a query per transfer, keyed the same way the
+        # callers look entries up
+        query = """
+            SELECT sender, recipient, amount, state, tx_hash FROM transfers
+            WHERE network = ? AND run_id = ?
+        """
+        params = [network, self.run_id]
+        if sender is not None:
+            query += " AND sender = ?"
+            params.append(sender.lower())
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return {
+            (row_sender, recipient, amount): JournalEntry(
+                recipient, amount, state, tx_hash
+            )
+            for row_sender, recipient, amount, state, tx_hash in rows
+        }
+
+    def sent_hashes(self, network: str, sender: str | None = None) -> dict:
+        # Every hash signed for a key, oldest first. A replaced transaction keeps
+        # only its newest hash in transfers, but any of them may be the one mined
+        query = """
+            SELECT sender, recipient, amount, tx_hash FROM events
+            WHERE network = ? AND run_id = ? AND state IN (?, ?)
+                AND tx_hash IS NOT NULL
+        """
+        params = [network, self.run_id, SIGNED, BROADCAST]
+        if sender is not None:
+            query += " AND sender = ?"
+            params.append(sender.lower())
+        query += " ORDER BY created_at"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        hashes = {}
+        for row_sender, recipient, amount, tx_hash in rows:
+            key = (row_sender, recipient, amount)
+            if tx_hash not in hashes.setdefault(key, []):
+                hashes[key].append(tx_hash)
+        return hashes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def journal_amount(amount, occurrence: int = 0) -> str:
+    # Rows repeating a recipient and amount are told apart by how many identical
+    # rows came before them, the first keeps the plain amount
+    return str(amount) if not occurrence else f"{amount}#{occurrence}"
+
+
+def journal_amount_wei(amount: str) -> int:
+    return int(str(amount).partition("#")[0])
+
+
+def journal_key(
+    sender: str, recipient: str, amount, occurrence: int = 0
+) -> tuple[str, str, str]:
+    return sender.lower(), recipient.lower(), journal_amount(amount, occurrence)
+
+
+def reconcile(journal: TransferJournal, client, entries: dict) -> tuple[set, dict]:
+    # Returns the keys that must not be sent again and, among them, the hashes
+    # that are still waiting to be mined
+    # Rows left in signed/broadcast state may or may not have reached the chain, so
+    # they are checked by hash before anything is resent
+    done = {key for key, entry in entries.items() if entry.state == CONFIRMED}
+    unknown = {
+        key: entry
+        for key, entry in entries.items()
+        if entry.state in (SIGNED, BROADCAST) and entry.tx_hash
+    }
+    if not unknown:
+        return done, {}
+
+    # Replacements leave several hashes per key, any of them may have landed
+    history = journal.sent_hashes(client.network.name)
+    candidates = {
+        key: [tx_hash for tx_hash in history.get(key, []) if tx_hash != entry.tx_hash]
+        + [entry.tx_hash]
+        for key, entry in unknown.items()
+    }
+    calls = [(key, tx_hash) for key, hashes in candidates.items() for tx_hash in hashes]
+    receipts = client.batch_transport.call_many(
+        ("eth_getTransactionReceipt", [tx_hash]) for _, tx_hash in calls
+    )
+    landed = {}
+    for (key, tx_hash), receipt in zip(calls, receipts):
+        if receipt and not isinstance(receipt, RPCError):
+            landed[key] = (tx_hash, receipt)
+
+    pending = {}
+    for key, hashes in candidates.items():
+        sender, recipient, amount = key
+        if key not in landed:
+            pending[key] = hashes
+            continue
+
+        tx_hash, receipt = landed[key]
+        if int(receipt["status"], 16) == 1:
+            journal.mark(
+                client.network.name, sender, recipient, amount, CONFIRMED, tx_hash
+            )
+            done.add(key)
+        else:
+            journal.mark(
+                client.network.name, sender, recipient, amount, FAILED, tx_hash
+            )
+
+    if pending:
+        calls = [
+            (key, tx_hash) for key, hashes in pending.items() for tx_hash in hashes
+        ]
+        known = client.batch_transport.call_many(
+            ("eth_getTransactionByHash", [tx_hash]) for _, tx_hash in calls
+        )
+        in_mempool = {}
+        for (key, tx_hash), tx in zip(calls, known):
+            # A failed lookup is not proof of absence, treat it like a known one
+            if tx is not None:
+                in_mempool[key] = tx_hash
+        # Keys with no hash in any mempool never made it out, safe to send again
+        pending = in_mempool
+        done.update(pending)
+
+    return done, pending
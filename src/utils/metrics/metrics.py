@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from loguru import logger
+from ...config.constants import METRICS_LATENCY_BUCKETS
+
+RPC_LATENCY = "multisender_rpc_latency_seconds"
+RPC_ERRORS = "multisender_rpc_errors_total"
+STAGE_LATENCY = "multisender_stage_seconds"
+RETRIES = "multisender_retries_total"
+REPLACEMENTS = "multisender_tx_replacements_total"
+
+HELP = {
+    RPC_LATENCY: "JSON-RPC round trip time by method and endpoint",
+    RPC_ERRORS: "Failed JSON-RPC calls by method, endpoint and error",
+    STAGE_LATENCY: "Time spent per transfer in each pipeline stage",
+    RETRIES: "Retried attempts by function and exception class",
+    REPLACEMENTS: "Stuck transactions re-sent under the same nonce with a higher fee",
+}
+
+
+def endpoint_label(rpc: str) -> str:
+    # Paths and query strings often carry api keys, the host is enough to tell
+    # endpoints apart in a dashboard
+    return urlparse(rpc).netloc or rpc
+
+
+class Histogram:
+
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: int = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at, **labels)
+
+    def stage(self, stage: str):
+        return self.timer(STAGE_LATENCY, stage=stage)
+
+    def observe_rpc(
+        self, method: str, rpc: str, latency: float, error: str | None = None
+    ) -> None:
+        endpoint = endpoint_label(rpc)
+        self.observe(RPC_LATENCY, latency, method=method, endpoint=endpoint)
+        if error is not None:
+            self.inc(RPC_ERRORS, method=method, endpoint=endpoint, error=error)
+
+    def count_retry(self, function: str, error: Exception) -> None:
+        self.inc(RETRIES, function=function, exception=type(error).__name__)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            histograms = {
+                key: histogram.to_dict() for key, histogram in self._histograms.items()
+            }
+            counters = dict(self._counters)
+
+        report = {}
+        for (name, labels), value in list(histograms.items()) + list(counters.items()):
+            report.setdefault(name, []).append(
+                {"labels": dict(labels), **_as_dict(value)}
+            )
+        return report
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            histograms = sorted(
+                (key, histogram.buckets, list(histogram.counts), histogram.sum)
+                for key, histogram in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+
+        lines, declared = [], set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), buckets, counts, total in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Metrics saved to {path}")
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(
+            target=server.serve_forever, name="metrics", daemon=True
+        ).start()
+        logger.info(
+            f"Serving metrics on http://{host}:{server.server_address[1]}/metrics"
+        )
+        return server
+
+
+def _as_dict(value) -> dict:
+    return value if isinstance(value, dict) else {"value": value}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
@@ -0,0 +1,188 @@
+import threading
+from collections.abc import Mapping
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+pytest.importorskip("eth_tester")
+from web3 import EthereumTesterProvider
+
+from benchmarks.mock_node import MockNode, NodeConfig
+from src.actions.transfer import Transfer
+from src.config.constants import DISPERSE_BASE_GAS, DISPERSE_GAS_PER_RECIPIENT
+from src.models.networks import Network
+from src.utils.journal.journal import CONFIRMED, FAILED, TransferJournal
+
+# disperseEther(address[] recipients, uint256[] values) payable: sends values[i]
+# to recipients[i] with the 2300 gas stipend, reverts if the lengths differ or
+# any send fails, then refunds whatever is left to the caller. Same selector and
+# behaviour as the deployed Disperse contract
+DISPERSE_BYTECODE = (
+    "0x608980600b6000396000f360003560e01c63e63d38ed146100155760006000fd5b600435"
+    "6004016024356004018135813581146100315760006000fd5b60005b8181101561006d5780"
+    "6001016020028085013590840135600060006000600084866000f115610067575050600101"
+    "610034565b60006000fd5b47801561008757600060006000600084336000f115610067575b"
+    "00"
+)
+# Reverts on every call, so any ether sent to it fails
+REJECTING_BYTECODE = "0x600580600b6000396000f360006000fd"
+
+
+def to_rpc(value):
+    # Results as a JSON-RPC node returns them: quantities and bytes as hex
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return {key: to_rpc(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_rpc(item) for item in value]
+    return value
+
+
+class EthTesterNode(MockNode):
+    # The mock node's HTTP front end over an in-process py-evm chain, so the
+    # client runs against real contract execution and instant mining
+
+    def __init__(self):
+        super().__init__(NodeConfig(latency=0, jitter=0))
+        self.w3 = Web3(EthereumTesterProvider())
+        self._chain_lock = threading.Lock()
+
+    def start(self) -> "EthTesterNode":
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def _answer(self, request: dict) -> dict:
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            with self._chain_lock:
+                result = self.w3.manager.request_blocking(
+                    request["method"], request.get("params", [])
+                )
+            reply["result"] = to_rpc(result)
+        except Exception as e:
+            reply["error"] = {"code": -32000, "message": str(e)}
+        return reply
+
+    def deploy(self, bytecode: str) -> str:
+        with self._chain_lock:
+            tx_hash = self.w3.eth.send_transaction(
+                {"from": self.w3.eth.accounts[0], "data": bytecode}
+            )
+            return self.w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+
+    def fund(self, address: str, amount: int) -> None:
+        with self._chain_lock:
+            tx_hash = self.w3.eth.send_transaction(
+                {"from": self.w3.eth.accounts[0], "to": address, "value": amount}
+            )
+            self.w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    def balance(self, address: str) -> int:
+        with self._chain_lock:
+            return self.w3.eth.get_balance(address)
+
+
+@pytest.fixture(scope="module")
+def node():
+    node = EthTesterNode().start()
+    yield node
+    node.stop()
+
+
+@pytest.fixture(scope="module")
+def network(node):
+    return Network(
+        name="EthTester",
+        chain_id=node.w3.eth.chain_id,
+        rpc_list=[node.url],
+        scanner=node.url,
+        disperse_contract=node.deploy(DISPERSE_BYTECODE),
+    )
+
+
+@pytest.fixture
+def transfer(node, network, tmp_path):
+    account = Account.create()
+    node.fund(account.address, 10**20)
+    transfer = Transfer(
+        account_name="disperse test", private_key=account.key.hex(), network=network
+    )
+    transfer.journal = TransferJournal("disperse", str(tmp_path / "journal.sqlite3"))
+    yield transfer
+    transfer.journal.close()
+
+
+def recipients(count: int) -> list[tuple[str, int]]:
+    return [(Account.create().address, (i + 1) * 10**15) for i in range(count)]
+
+
+def journal_states(transfer: Transfer) -> dict:
+    entries = transfer.journal.load(transfer.network.name, transfer.address)
+    return {recipient: entry.state for (_, recipient, _), entry in entries.items()}
+
+
+def test_disperse_pays_every_recipient_in_one_transaction(node, network, transfer):
+    transfers = recipients(5)
+
+    results = transfer.perform_disperse(transfers)
+
+    assert [state for _, _, state, _ in results] == [CONFIRMED] * 5
+    assert len({tx_hash for _, _, _, tx_hash in results}) == 1
+    for address, amount in transfers:
+        assert node.balance(address) == amount
+    assert node.balance(network.disperse_contract) == 0
+    assert set(journal_states(transfer).values()) == {CONFIRMED}
+
+
+def test_disperse_splits_by_gas_target(node, transfer):
+    transfers = recipients(5)
+
+    results = transfer.perform_disperse(
+        transfers, gas_target=DISPERSE_BASE_GAS + 2 * DISPERSE_GAS_PER_RECIPIENT
+    )
+
+    assert [state for _, _, state, _ in results] == [CONFIRMED] * 5
+    assert len({tx_hash for _, _, _, tx_hash in results}) == 3
+    for address, amount in transfers:
+        assert node.balance(address) == amount
+
+
+def test_rejected_chunk_falls_back_to_single_transfers(node, transfer):
+    rejecting = node.deploy(REJECTING_BYTECODE)
+    (first, first_amount), (second, second_amount) = recipients(2)
+
+    results = transfer.perform_disperse(
+        [(first, first_amount), (rejecting, 10**15), (second, second_amount)]
+    )
+
+    states = {address: state for address, _, state, _ in results}
+    assert states == {first: CONFIRMED, rejecting: FAILED, second: CONFIRMED}
+    # Every EOA is paid exactly once, the chunk itself never landed
+    assert node.balance(first) == first_amount
+    assert node.balance(second) == second_amount
+    assert node.balance(rejecting) == 0
+    assert journal_states(transfer)[first.lower()] == CONFIRMED
+    assert journal_states(transfer)[rejecting.lower()] != CONFIRMED
+
+
+def test_resume_skips_journaled_chunks(node, transfer):
+    from main import load_processed_addresses
+    from src.utils.journal.journal import journal_key
+
+    transfers = recipients(3)
+    transfer.perform_disperse(transfers)
+
+    done, pending = load_processed_addresses(
+        transfer.journal, transfer, transfer.address
+    )
+
+    assert not pending
+    for address, amount in transfers:
+        assert journal_key(transfer.address, address, amount) in done
@@ -0,0 +1,156 @@
+import pytest
+from eth_account import Account
+
+from benchmarks.mock_node import MockNode, NodeConfig
+from src.actions.transfer import Transfer
+from src.models.networks import Network
+from src.utils.journal.journal import (
+    BROADCAST,
+    CONFIRMED,
+    SIGNED,
+    TransferJournal,
+    journal_amount,
+    journal_amount_wei,
+    journal_key,
+    reconcile,
+)
+
+
+@pytest.fixture(scope="module")
+def node():
+    # Blocks are mined by the tests, never on a timer
+    node = MockNode(NodeConfig(latency=0, jitter=0, block_time=3600)).start()
+    yield node
+    node.stop()
+
+
+@pytest.fixture
+def client(node):
+    network = Network(
+        name="JournalTest",
+        chain_id=node.config.chain_id,
+        rpc_list=[node.url],
+        scanner=node.url,
+    )
+    return Transfer(
+        account_name="journal test",
+        private_key=Account.create().key.hex(),
+        network=network,
+    )
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TransferJournal("test", str(tmp_path / "journal.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def sign(
+    client: Transfer, nonce: int, recipient: str, gas_price: int = 10**9
+) -> tuple[str, str]:
+    signed = Account.sign_transaction(
+        {
+            "nonce": nonce,
+            "to": recipient,
+            "value": 1,
+            "gas": 21000,
+            "gasPrice": gas_price,
+            "chainId": client.chain_id,
+        },
+        client.private_key,
+    )
+    return "0x" + bytes(signed.rawTransaction).hex(), "0x" + bytes(signed.hash).hex()
+
+
+def send(node: MockNode, raw: str) -> str:
+    with node._lock:
+        return node.rpc_eth_sendRawTransaction(raw)
+
+
+def mine(node: MockNode) -> None:
+    with node._lock:
+        node._mine()
+
+
+def mark(journal, client, recipient, amount, state, tx_hash=None):
+    journal.mark(client.network.name, client.address, recipient, amount, state, tx_hash)
+
+
+def test_repeated_rows_get_their_own_keys(client, journal):
+    recipient = Account.create().address
+
+    assert journal_amount(10**15) == str(10**15)
+    assert journal_amount(10**15, 2) == f"{10**15}#2"
+    assert journal_amount_wei(journal_amount(10**15, 2)) == 10**15
+    assert journal_key(client.address, recipient, 10**15, 1) == (
+        client.address.lower(),
+        recipient.lower(),
+        f"{10**15}#1",
+    )
+
+    for occurrence in range(3):
+        mark(journal, client, recipient, journal_amount(10**15, occurrence), CONFIRMED)
+
+    entries = journal.load(client.network.name, client.address)
+    assert set(entries) == {
+        journal_key(client.address, recipient, 10**15, occurrence)
+        for occurrence in range(3)
+    }
+
+
+def test_reconcile_sorts_unfinished_entries_by_what_reached_the_chain(
+    node, client, journal
+):
+    mined, queued, unsent, confirmed = (Account.create().address for _ in range(4))
+
+    mined_hash = send(node, sign(client, 0, mined)[0])
+    mine(node)
+    queued_hash = send(node, sign(client, 1, queued)[0])
+    # Signed but lost before it reached the node
+    _, unsent_hash = sign(client, 2, unsent)
+
+    mark(journal, client, mined, 1, BROADCAST, mined_hash)
+    mark(journal, client, queued, 1, BROADCAST, queued_hash)
+    mark(journal, client, unsent, 1, SIGNED, unsent_hash)
+    mark(journal, client, confirmed, 1, CONFIRMED, "0x" + "11" * 32)
+
+    done, pending = reconcile(
+        journal, client, journal.load(client.network.name, client.address)
+    )
+
+    keys = {
+        name: journal_key(client.address, address, 1)
+        for name, address in (
+            ("mined", mined),
+            ("queued", queued),
+            ("unsent", unsent),
+            ("confirmed", confirmed),
+        )
+    }
+    assert done == {keys["mined"], keys["queued"], keys["confirmed"]}
+    assert pending == {keys["queued"]: queued_hash}
+    # Only the mined transfer changes state, the rest are left for the resume
+    entry = journal.get(client.network.name, client.address, mined, 1)
+    assert (entry.state, entry.tx_hash) == (CONFIRMED, mined_hash)
+    assert journal.get(client.network.name, client.address, unsent, 1).state == SIGNED
+
+
+def test_reconcile_finds_a_replaced_transaction_that_landed(node, client, journal):
+    recipient = Account.create().address
+
+    original = send(node, sign(client, 0, recipient)[0])
+    mark(journal, client, recipient, 1, BROADCAST, original)
+    mine(node)
+    # The replacement never made it, the original did
+    _, replacement = sign(client, 0, recipient, gas_price=2 * 10**9)
+    mark(journal, client, recipient, 1, BROADCAST, replacement)
+
+    done, pending = reconcile(
+        journal, client, journal.load(client.network.name, client.address)
+    )
+
+    assert done == {journal_key(client.address, recipient, 1)}
+    assert not pending
+    entry = journal.get(client.network.name, client.address, recipient, 1)
+    assert (entry.state, entry.tx_hash) == (CONFIRMED, original)
@@ -0,0 +1,82 @@
+import asyncio
+from eth_account import Account
+
+from src.client.nonce_manager import NonceManager
+
+
+class Chain:
+    # Pending nonce as the node reports it, counting how often it was asked
+
+    def __init__(self, pending: int):
+        self.pending = pending
+        self.fetches = 0
+
+    def fetch(self) -> int:
+        self.fetches += 1
+        return self.pending
+
+    async def fetch_async(self) -> int:
+        return self.fetch()
+
+
+def manager() -> NonceManager:
+    return NonceManager(1, Account.create().address)
+
+
+def test_allocates_consecutive_nonces_from_one_fetch():
+    chain, nonces = Chain(5), manager()
+
+    assert [nonces.allocate(chain.fetch) for _ in range(3)] == [5, 6, 7]
+    assert chain.fetches == 1
+
+
+def test_releasing_the_last_nonce_hands_it_out_again():
+    chain, nonces = Chain(5), manager()
+    nonces.allocate(chain.fetch)
+    last = nonces.allocate(chain.fetch)
+
+    nonces.release(last)
+
+    assert nonces.allocate(chain.fetch) == last
+    assert chain.fetches == 1
+
+
+def test_releasing_an_earlier_nonce_resyncs_instead_of_leaving_a_gap():
+    chain, nonces = Chain(5), manager()
+    first = nonces.allocate(chain.fetch)
+    nonces.allocate(chain.fetch)
+
+    nonces.release(first)
+    # Only the later transaction reached the node
+    chain.pending = 6
+
+    assert nonces.allocate(chain.fetch) == 6
+    assert chain.fetches == 2
+
+
+def test_resync_fetches_the_pending_nonce_again():
+    chain, nonces = Chain(5), manager()
+    nonces.allocate(chain.fetch)
+    # Something else sent from this wallet meanwhile
+    chain.pending = 9
+
+    nonces.resync()
+
+    assert nonces.allocate(chain.fetch) == 9
+    assert chain.fetches == 2
+
+
+def test_async_allocation_shares_the_stream_and_resyncs():
+    chain, nonces = Chain(3), manager()
+
+    async def allocate(count):
+        return [await nonces.allocate_async(chain.fetch_async) for _ in range(count)]
+
+    assert asyncio.run(allocate(2)) == [3, 4]
+    nonces.release(4)
+    assert nonces.allocate(chain.fetch) == 4
+
+    chain.pending = 10
+    nonces.resync()
+    assert asyncio.run(allocate(1)) == [10]
+    assert chain.fetches == 2